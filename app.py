@@ -1,11 +1,33 @@
 import streamlit as st
 import pandas as pd
 import numpy as np
-import re
+import os
 import plotly.express as px
 import plotly.graph_objects as go
 import plotly.io as pio
 
+from bitmaps import bitmap_positions, popcount, resolve
+from dataplane import attach, ensure_published
+from datasets import FILTER_DIMENSIONS, QUANTILE_METRICS, build_pipeline, export_columns
+from export import EXPORT_FORMATS, export_bytes
+from governor import GOVERNOR, admin_authorized, current_session_id, estimate_bytes, render_admin_page
+from geo import (
+    GEOJSON_PATH, build_simplified_levels, choropleth_base, load_province_geojson, province_choropleth,
+    publish_level, tolerance_for_view
+)
+from payload import CompactFigure, PayloadMeter
+from psychometrics import LITERACY_ITEMS, MIN_DIAGNOSTIC_N, construct_diagnostics
+from sketches import merged_sketch
+from snapshots import (
+    INGEST_CONFLICT, SNAPSHOT_DIR, SUMMARY_FILE, TREND_METRICS, period_changes, read_partitions, read_summaries
+)
+from weighting import (
+    weighted_column_means,
+    weighted_counts,
+    weighted_group_mean,
+    weighted_mean,
+)
+
 # ==================== PAGE CONFIG ====================
 st.set_page_config(
     page_title="Dashboard Analisis Finansial Generasi Z Indonesia",
@@ -124,89 +146,77 @@ section[data-testid="stSidebar"] h3 {
 
 </style>""", unsafe_allow_html=True)
 
-# ==================== FUNGSI PEMBERSIHAN ====================
-def parse_rupiah_range(value):
-    if pd.isna(value):
-        return np.nan
-    value = str(value).replace("Rp", "").replace(".", "").replace(",", "").strip()
-    if "-" in value:
-        parts = re.split(r"[-–]", value)
-        try:
-            nums = [int(p.strip()) for p in parts if p.strip().isdigit()]
-            if len(nums) == 2:
-                return np.mean(nums)
-        except:
-            return np.nan
-    elif value.isdigit():
-        return float(value)
-    else:
-        return np.nan
-
-# ==================== LOAD DATA ====================
-@st.cache_data
-def load_data():
-    paths = {
-            "profile": "GenZ_Financial_Profile.csv",
-            "literacy": "GenZ_Financial_Literacy_Survey.csv",
-            "regional": "Regional_Economic_Indicators.csv",
-    }
-
-    def read_file(path):
-        try:
-            return pd.read_csv(path, delimiter=";", encoding="utf-8")
-        except UnicodeDecodeError:
-            return pd.read_csv(path, delimiter=";", encoding="ISO-8859-1")
-
-    df_profile = read_file(paths["profile"])
-    df_literacy = read_file(paths["literacy"])
-    df_regional = read_file(paths["regional"])
-
-    return df_profile, df_literacy, df_regional
-
-df_profile, df_literacy, df_regional = load_data()
-
-# ==================== PEMBERSIHAN DATA ====================
-df_profile["avg_monthly_income"] = df_profile["avg_monthly_income"].apply(parse_rupiah_range)
-df_profile["avg_monthly_expense"] = df_profile["avg_monthly_expense"].apply(parse_rupiah_range)
-
-# ==================== PEMBERSIHAN DATA REGIONAL ====================
-df_regional.columns = df_regional.columns.str.strip().str.lower()
-
-# Ubah nama kolom agar konsisten
-df_regional = df_regional.rename(columns={
-    "provinsi": "province",
-    "jumlah rekening penerima pinjaman aktif (entitas)": "active_loan_accounts",
-    "jumlah dana yang diberikan (rp miliar)": "loan_amount_billion",
-    "jumlah rekening pemberi pinjaman (akun)": "lender_accounts",
-    "twp 90%": "twp_90",
-    "jumlah penerima pinjaman (akun)": "borrowers",
-    "outstanding pinjaman (rp miliar)": "outstanding_billion",
-    "jumlah penduduk (ribu)": "population_thousand",
-    "pdrb (ribu rp)": "pdrb_thousand_rp",
-    "urbanisasi (%)": "urbanization_rate"
-})
-
-# Bersihkan isi kolom numerik dari karakter selain angka dan titik
-num_cols = [
-    "loan_amount_billion",
-    "outstanding_billion",
-    "population_thousand",
-    "pdrb_thousand_rp",
-    "urbanization_rate"
-]
-
-for col in num_cols:
-    if col in df_regional.columns:
-        df_regional[col] = (
-            df_regional[col]
-            .astype(str)
-            .str.replace(r"[^\d,\.]", "", regex=True)  # hapus karakter aneh
-            .str.replace(",", ".", regex=False)        # ubah koma ke titik
-        )
-        df_regional[col] = pd.to_numeric(df_regional[col], errors="coerce")
-
-# Hapus baris yang tidak punya nilai provinsi atau data penting
-df_regional = df_regional.dropna(subset=["province", "loan_amount_billion"], how="any")
+# ==================== HALAMAN ADMIN (?admin=<ADMIN_TOKEN>) ====================
+# Pemakaian memori cache per proses & per sesi; nonaktif kecuali ADMIN_TOKEN diset
+if admin_authorized(st.query_params.get("admin")):
+    render_admin_page(GOVERNOR)
+    st.stop()
+
+# ==================== PIPELINE DATA ====================
+@st.cache_resource
+def get_pipeline():
+    # Satu DAG per proses: tiap tahap dihitung sekali per versi file sumber
+    return build_pipeline()
+
+# Cache di bawah berbagi satu anggaran memori per proses (lihat governor.py);
+# entri yang jarang dipakai & murah dihitung ulang dibuang lebih dulu.
+# Data plane dipin: halamannya memori bersama, jadi tidak dihitung ke anggaran privat.
+@GOVERNOR.cached("data", pinned=True)
+def attach_data_plane(version):
+    # Dipetakan (mmap) sekali per proses per versi; semua sesi memakai tabel yang sama
+    return attach(version)
+
+# Versi diperiksa tiap rerun; bila file sumber berubah, data plane diterbitkan ulang
+# (sekali untuk semua worker) lalu tiap worker berpindah ke versi baru
+pipeline = get_pipeline()
+plane_version = ensure_published(pipeline)
+data = attach_data_plane(plane_version)
+
+# Entri milik versi data plane lama dilepas; halaman /dev/shm versi lama baru bisa dibebaskan
+# setelah tidak ada lagi yang memegang tabelnya
+VERSIONED_ENTRIES = {"attach_data_plane", "df_filtered", "cached_figure"}
+GOVERNOR.release(lambda key: key[0] in VERSIONED_ENTRIES and key[1] != plane_version)
+
+# Tabel data plane bersifat read-only dan dipakai bersama: jangan diubah di tempat
+df_profile, df_literacy, df_regional = data["profile"], data["literacy"], data["regional"]
+
+@GOVERNOR.cached("data")
+def load_geometry_levels(path, mtime):
+    # Geometri disederhanakan sekali per versi file (mtime) untuk semua level detail
+    geojson = load_province_geojson(path)
+    return build_simplified_levels(geojson) if geojson else None
+
+@GOVERNOR.cached("data")
+def load_regional_summaries(root, mtime):
+    # Ringkasan per periode dibaca ulang hanya bila summaries.parquet berubah (mtime)
+    return read_summaries(root)
+
+@GOVERNOR.cached("data")
+def load_snapshot_partitions(root, periods, provinces, columns, mtime):
+    # Hanya partisi periode/provinsi yang diminta yang dibaca dari disk
+    return read_partitions(periods, provinces, columns, root)
+
+def cached_figure(name, key, build):
+    # Grafik yang hanya bergantung pada versi data (+ state di key) diringkas sekali per proses;
+    # build() mengembalikan None bila datanya kosong
+    def compact():
+        fig = build()
+        return fig if fig is None or isinstance(fig, CompactFigure) else CompactFigure(fig)
+    return GOVERNOR.get_or_compute("figure", ("cached_figure", data["version"], name, *key), compact)
+
+def province_map(provinces, values, **kwargs):
+    # Figure dasar (geometri ringkas) di-cache sekali per level detail & versi file geometri;
+    # tiap peta hanya menukar lokasi & nilai z di atasnya. Dengan static serving aktif,
+    # geometri dikirim sebagai file statis (sekali per browser), bukan di dalam tiap peta.
+    tolerance = tolerance_for_view(geo_levels, set(provinces))
+    static_serving = st.get_option("server.enableStaticServing")
+
+    def build_base():
+        level = geo_levels[tolerance]
+        return choropleth_base(level, geometry_url=publish_level(level) if static_serving else None)
+
+    base = GOVERNOR.get_or_compute("figure", ("choropleth_base", geo_mtime, tolerance, static_serving), build_base)
+    return province_choropleth(base, provinces, values, **kwargs)
 
 # ==================== HEADER ====================
 st.markdown("""
@@ -220,13 +230,105 @@ st.markdown("""
 </div>
 """, unsafe_allow_html=True)
 
+# Semua grafik dikirim lewat PayloadMeter (encoding ringkas + pencatatan byte per rerun)
+payload = PayloadMeter()
+
 # ==================== SIDEBAR FILTER ====================
 with st.sidebar:
     st.header("Filter Data")
-    provinces = df_profile["province"].dropna().unique()
-    genders = df_profile["gender"].dropna().unique()
-    selected_prov = st.selectbox("Pilih Provinsi", ["Semua"] + list(provinces))
-    selected_gender = st.selectbox("Pilih Jenis Kelamin", ["Semua"] + list(genders))
+    # Nilai tiap dimensi diambil dari indeks bitmap (dibangun sekali per versi data)
+    bitmap_index = data["profile_bitmaps"]
+    dimensions = bitmap_index["columns"]
+    selected_prov = st.selectbox("Pilih Provinsi", ["Semua"] + dimensions["province"]["values"])
+    selected_gender = st.selectbox("Pilih Jenis Kelamin", ["Semua"] + dimensions["gender"]["values"])
+
+    with st.expander("Filter Lanjutan"):
+        multi_selections = {
+            col: st.multiselect(FILTER_DIMENSIONS[col], dimensions[col]["values"], placeholder="Semua")
+            for col in [
+                "education_level", "employment_status", "main_fintech_app",
+                "investment_type", "loan_usage_purpose", "income_bucket"
+            ]
+        }
+        birth_years = dimensions["birth_year"]["values"]
+        year_range = st.slider(
+            FILTER_DIMENSIONS["birth_year"], min(birth_years), max(birth_years), (min(birth_years), max(birth_years))
+        )
+
+    geo_mtime = os.path.getmtime(GEOJSON_PATH) if os.path.exists(GEOJSON_PATH) else 0
+    geo_levels = load_geometry_levels(GEOJSON_PATH, geo_mtime)
+    province_view = st.radio(
+        "Tampilan Provinsi",
+        ["Grafik Batang", "Peta Choropleth"] if geo_levels else ["Grafik Batang"],
+        horizontal=True
+    )
+    if not geo_levels:
+        st.caption("Peta choropleth aktif setelah file batas provinsi tersedia: jalankan `python geo.py fetch`.")
+    use_weights = st.checkbox(
+        "Terapkan bobot survei",
+        value=False,
+        help=(
+            "Bobot post-stratifikasi (raking) yang mendekatkan komposisi provinsi, gender, dan usia ke "
+            "target populasi. Bobot dibatasi (trim), sehingga target tidak selalu tercapai: lihat "
+            "margin tercapai vs target di bawah."
+        )
+    )
+    if use_weights:
+        weighting_report = data["weighting_report"]
+        for name, label in [("profile", "Profil"), ("literacy", "Literasi")]:
+            report = weighting_report[name]
+            if report["converged"]:
+                st.caption(f"Bobot {label}: raking konvergen ({report['iterations']} iterasi).")
+            else:
+                st.warning(
+                    f"Bobot {label}: raking tidak konvergen dalam {report['iterations']} iterasi "
+                    f"(trim {report['trim']:g}×); selisih relatif margin terbesar {100 * report['max_gap']:,.0f}%. "
+                    "Komposisi berbobot belum sesuai populasi."
+                )
+        with st.expander("Margin Bobot: Target vs Tercapai"):
+            margin_source = st.radio("Data", ["Profil", "Literasi"], horizontal=True, key="margin_source")
+            margins = weighting_report["profile" if margin_source == "Profil" else "literacy"]["margins"]
+            st.dataframe(margins.round(2), use_container_width=True, hide_index=True)
+
+# Kombinasi filter = OR antar-nilai dalam satu dimensi, AND antar-dimensi, atas bitmap terindeks
+selections = {
+    "province": None if selected_prov == "Semua" else [selected_prov],
+    "gender": None if selected_gender == "Semua" else [selected_gender],
+    **multi_selections,
+    "birth_year": None if year_range == (min(birth_years), max(birth_years)) else
+        [year for year in birth_years if year_range[0] <= year <= year_range[1]],
+}
+advanced_filters = any(multi_selections.values()) or selections["birth_year"] is not None
+row_bitmap = resolve(bitmap_index, selections)
+
+# Jumlah baris (popcount) sudah diketahui sebelum agregasi apa pun
+n_matched = popcount(row_bitmap)
+with st.sidebar:
+    st.caption(f"{n_matched:,} dari {bitmap_index['n_rows']:,} responden cocok dengan filter.")
+
+# Posisi baris terpilih (dipakai ekspor tanpa menyalin DataFrame)
+row_positions = bitmap_positions(row_bitmap, bitmap_index["n_rows"])
+# Tanpa filter tabel bersama dipakai langsung; dengan filter cukup satu kali take, dan hasilnya
+# dipakai bersama sesi lain dengan kombinasi filter yang sama (read-only)
+filter_key = tuple((col, tuple(values)) for col, values in selections.items() if values)
+df_filtered = df_profile if n_matched == len(df_profile) else GOVERNOR.get_or_compute(
+    "aggregate", ("df_filtered", data["version"], filter_key), lambda: df_profile.take(row_positions)
+)
+
+# ==================== EKSPOR DATA TERFILTER ====================
+with st.sidebar:
+    st.subheader("Ekspor Data")
+    export_format = st.selectbox("Format File", list(EXPORT_FORMATS))
+    if st.button("Siapkan File Ekspor"):
+        mime, extension = EXPORT_FORMATS[export_format]
+        # Dienkode per potongan lalu diserahkan sebagai bytes (tanpa handle file yang perlu ditutup);
+        # kolom Rupiah diekspor sebagai label rentang aslinya
+        st.download_button(
+            f"Unduh {len(row_positions)} baris ({export_format})",
+            data=export_bytes(df_profile, export_format, row_positions, columns=export_columns(df_profile)),
+            file_name=f"genz_financial_profile_filtered.{extension}",
+            mime=mime
+        )
 
     st.markdown("""
     <div style="
@@ -244,11 +346,17 @@ with st.sidebar:
     </div>
     """, unsafe_allow_html=True)
 
-df_filtered = df_profile.copy()
-if selected_prov != "Semua":
-    df_filtered = df_filtered[df_filtered["province"] == selected_prov]
-if selected_gender != "Semua":
-    df_filtered = df_filtered[df_filtered["gender"] == selected_gender]
+if n_matched == 0:
+    st.warning("Tidak ada responden yang cocok dengan kombinasi filter ini. Longgarkan filter di sidebar.")
+    st.stop()
+
+# Vektor bobot (None = tanpa bobot) untuk semua agregat di bawah
+weights = df_filtered["survey_weight"].to_numpy() if use_weights else None
+
+def note_unweighted(reason):
+    # Panel yang tidak mendukung bobot survei diberi label saat bobot aktif
+    if use_weights:
+        st.caption(f"⚖️ Panel ini tidak berbobot: {reason}.")
 
 # ==================== QUICK STATS ====================
 st.markdown('<div class="kpi-section">', unsafe_allow_html=True)
@@ -265,21 +373,21 @@ col1.markdown(f"""
 col2.markdown(f"""
 <div class='stat-card'>
     <div class='stat-label'>Rata-rata Usia</div>
-    <div class='stat-value'>{df_filtered['birth_year'].apply(lambda x: 2025-x).mean():.1f}</div>
+    <div class='stat-value'>{weighted_mean(df_filtered['age'], weights):.1f}</div>
 </div>
 """, unsafe_allow_html=True)
 
 col3.markdown(f"""
 <div class='stat-card'>
     <div class='stat-label'>Pendapatan Rata-rata</div>
-    <div class='stat-value'>Rp {df_filtered['avg_monthly_income'].mean():,.0f}</div>
+    <div class='stat-value'>Rp {weighted_mean(df_filtered['avg_monthly_income'], weights):,.0f}</div>
 </div>
 """, unsafe_allow_html=True)
 
 col4.markdown(f"""
 <div class='stat-card'>
     <div class='stat-label'>Pengeluaran Rata-rata</div>
-    <div class='stat-value'>Rp {df_filtered['avg_monthly_expense'].mean():,.0f}</div>
+    <div class='stat-value'>Rp {weighted_mean(df_filtered['avg_monthly_expense'], weights):,.0f}</div>
 </div>
 """, unsafe_allow_html=True)
 
@@ -298,36 +406,45 @@ with tab1:
     st.markdown('<div class="section-header"><h3>Distribusi Responden per Provinsi</h3></div>', unsafe_allow_html=True)
     
     # Hitung jumlah responden per provinsi
-    prov_count = df_filtered["province"].value_counts().reset_index()
+    prov_count = weighted_counts(df_filtered["province"], weights).reset_index()
     prov_count.columns = ["Provinsi", "Jumlah Responden"]
 
     # Histogram kolom vertikal (tanpa label nilai)
-    fig_prov = px.bar(
-        prov_count.sort_values("Jumlah Responden", ascending=False),
-        x="Provinsi",
-        y="Jumlah Responden",
-        color="Jumlah Responden",
-        color_continuous_scale="Blues",
-        title="Sebaran Responden Gen Z per Provinsi"
-    )
+    if province_view == "Peta Choropleth":
+        fig_prov = province_map(
+            prov_count["Provinsi"],
+            prov_count["Jumlah Responden"],
+            title="Sebaran Responden Gen Z per Provinsi",
+            hover_label="Jumlah Responden",
+            height=600
+        )
+    else:
+        fig_prov = px.bar(
+            prov_count.sort_values("Jumlah Responden", ascending=False),
+            x="Provinsi",
+            y="Jumlah Responden",
+            color="Jumlah Responden",
+            color_continuous_scale="Blues",
+            title="Sebaran Responden Gen Z per Provinsi"
+        )
 
-    fig_prov.update_layout(
-        xaxis_title="Provinsi",
-        yaxis_title="Jumlah Responden",
-        template="plotly_white",
-        height=600,
-        margin=dict(t=80, b=150),
-        xaxis_tickangle=45,
-        coloraxis_showscale=False  # sembunyikan skala warna agar lebih bersih
-    )
-    st.plotly_chart(fig_prov, use_container_width=True)
+        fig_prov.update_layout(
+            xaxis_title="Provinsi",
+            yaxis_title="Jumlah Responden",
+            template="plotly_white",
+            height=600,
+            margin=dict(t=80, b=150),
+            xaxis_tickangle=45,
+            coloraxis_showscale=False  # sembunyikan skala warna agar lebih bersih
+        )
+    payload.plotly_chart(fig_prov, "fig_prov")
 
     # ==================== Distribusi Gender dan Pekerjaan ====================
     st.markdown('<div class="section-header"><h3>Komposisi Demografis Responden</h3></div>', unsafe_allow_html=True)
     col_demo1, col_demo2 = st.columns(2)
     
     with col_demo1:
-        gender_count = df_filtered["gender"].value_counts().reset_index()
+        gender_count = weighted_counts(df_filtered["gender"], weights).reset_index()
         gender_count.columns = ["Gender", "Jumlah"]
         fig_gender = px.pie(
             gender_count,
@@ -336,11 +453,11 @@ with tab1:
             color_discrete_sequence=["#1E3C72", "#A7C7E7"],
             title="Proporsi Jenis Kelamin"
         )
-        st.plotly_chart(fig_gender, use_container_width=True)
+        payload.plotly_chart(fig_gender, "fig_gender")
     
     with col_demo2:
         if "employment_status" in df_filtered.columns:
-            job_count = df_filtered["employment_status"].value_counts().reset_index()
+            job_count = weighted_counts(df_filtered["employment_status"], weights).reset_index()
             job_count.columns = ["Status Pekerjaan", "Jumlah"]
             fig_job = px.bar(
                 job_count,
@@ -356,7 +473,7 @@ with tab1:
                 template="plotly_white",
                 coloraxis_showscale=False
             )
-            st.plotly_chart(fig_job, use_container_width=True)
+            payload.plotly_chart(fig_job, "fig_job")
 
     # ==================== Insight Naratif ====================
     st.markdown(f"""
@@ -374,6 +491,7 @@ with tab2:
 
     # Ubah menjadi long/melt format
     df_melted = df_filtered.melt(
+        id_vars=["survey_weight"],
         value_vars=["avg_monthly_income", "avg_monthly_expense"],
         var_name="Jenis",
         value_name="Jumlah"
@@ -383,6 +501,8 @@ with tab2:
     fig_hist = px.histogram(
         df_melted,
         x="Jumlah",
+        y="survey_weight" if use_weights else None,
+        histfunc="sum" if use_weights else "count",
         color="Jenis",
         nbins=20,
         barmode="group",
@@ -400,44 +520,57 @@ with tab2:
         title_font_color="#1e3c72"
     )
 
-    st.plotly_chart(fig_hist, use_container_width=True)
+    payload.plotly_chart(fig_hist, "fig_hist")
 
     # Pendapatan & Pengeluaran per Provinsi
     st.markdown('<div class="section-header"><h3>Pendapatan dan Pengeluaran Rata-rata per Provinsi</h3></div>', unsafe_allow_html=True)
-    df_avg = (
-        df_filtered.groupby("province")[["avg_monthly_income", "avg_monthly_expense"]]
-        .mean()
-        .reset_index()
-    )
-
-    fig_income_expense = go.Figure()
-    fig_income_expense.add_trace(go.Bar(
-        x=df_avg["province"],
-        y=df_avg["avg_monthly_income"],
-        name="Pendapatan Rata-rata",
-        marker_color="#1e3c72",
-        hovertemplate="<b>%{x}</b><br>Pendapatan: Rp %{y:,.0f}<extra></extra>"
-    ))
-    fig_income_expense.add_trace(go.Bar(
-        x=df_avg["province"],
-        y=df_avg["avg_monthly_expense"],
-        name="Pengeluaran Rata-rata",
-        marker_color="#e74c3c",
-        hovertemplate="<b>%{x}</b><br>Pengeluaran: Rp %{y:,.0f}<extra></extra>"
-    ))
-    fig_income_expense.update_layout(
-        title="Pendapatan dan Pengeluaran Rata-rata per Provinsi",
-        barmode="group",
-        xaxis_title="Provinsi",
-        yaxis_title="Nilai (Rupiah)",
-        template="plotly_white",
-        legend=dict(orientation="h", yanchor="bottom", y=1.05, xanchor="center", x=0.5),
-        height=650,
-        margin=dict(t=80, b=100),
-        title_font_color="#1e3c72"
-    )
-    fig_income_expense.update_xaxes(tickangle=45, tickfont=dict(size=11))
-    st.plotly_chart(fig_income_expense, use_container_width=True)
+    df_avg = weighted_group_mean(
+        df_filtered, "province", ["avg_monthly_income", "avg_monthly_expense"], weights
+    ).reset_index()
+
+    if province_view == "Peta Choropleth":
+        # Geometri sama untuk kedua peta; hanya larik nilai per provinsi yang berbeda
+        col_map1, col_map2 = st.columns(2)
+        for col, metric, label in [
+            (col_map1, "avg_monthly_income", "Pendapatan Rata-rata"),
+            (col_map2, "avg_monthly_expense", "Pengeluaran Rata-rata"),
+        ]:
+            with col:
+                payload.plotly_chart(province_map(
+                    df_avg["province"], df_avg[metric],
+                    title=f"{label} per Provinsi",
+                    hover_label=f"{label} (Rp)",
+                    height=450
+                ), f"map_{metric}")
+    else:
+        fig_income_expense = go.Figure()
+        fig_income_expense.add_trace(go.Bar(
+            x=df_avg["province"],
+            y=df_avg["avg_monthly_income"],
+            name="Pendapatan Rata-rata",
+            marker_color="#1e3c72",
+            hovertemplate="<b>%{x}</b><br>Pendapatan: Rp %{y:,.0f}<extra></extra>"
+        ))
+        fig_income_expense.add_trace(go.Bar(
+            x=df_avg["province"],
+            y=df_avg["avg_monthly_expense"],
+            name="Pengeluaran Rata-rata",
+            marker_color="#e74c3c",
+            hovertemplate="<b>%{x}</b><br>Pengeluaran: Rp %{y:,.0f}<extra></extra>"
+        ))
+        fig_income_expense.update_layout(
+            title="Pendapatan dan Pengeluaran Rata-rata per Provinsi",
+            barmode="group",
+            xaxis_title="Provinsi",
+            yaxis_title="Nilai (Rupiah)",
+            template="plotly_white",
+            legend=dict(orientation="h", yanchor="bottom", y=1.05, xanchor="center", x=0.5),
+            height=650,
+            margin=dict(t=80, b=100),
+            title_font_color="#1e3c72"
+        )
+        fig_income_expense.update_xaxes(tickangle=45, tickfont=dict(size=11))
+        payload.plotly_chart(fig_income_expense, "fig_income_expense")
 
     # 🔸 Dua grafik berdampingan: Pengeluaran per Gender dan Penggunaan E-Wallet
     if "gender" in df_filtered.columns or "main_fintech_app" in df_filtered.columns:
@@ -447,7 +580,7 @@ with tab2:
         # Grafik 1: Pengeluaran per Gender
         with col1:
             if "gender" in df_filtered.columns:
-                df_gender_exp = df_filtered.groupby("gender")["avg_monthly_expense"].mean().reset_index()
+                df_gender_exp = weighted_group_mean(df_filtered, "gender", ["avg_monthly_expense"], weights).reset_index()
                 fig_gender_exp = px.bar(
                     df_gender_exp,
                     x="gender",
@@ -463,12 +596,12 @@ with tab2:
                     showlegend=False,
                     title_font_color="#1e3c72"
                 )
-                st.plotly_chart(fig_gender_exp, use_container_width=True)
+                payload.plotly_chart(fig_gender_exp, "fig_gender_exp")
 
         # Grafik 2: Distribusi Penggunaan E-Wallet
         with col2:
             if "main_fintech_app" in df_filtered.columns:
-                ewallet_count = df_filtered["main_fintech_app"].value_counts().reset_index()
+                ewallet_count = weighted_counts(df_filtered["main_fintech_app"], weights).reset_index()
                 ewallet_count.columns = ["E-Wallet", "Jumlah Pengguna"]
 
                 fig_ewallet = px.bar(
@@ -487,10 +620,96 @@ with tab2:
                     showlegend=False,
                     title_font_color="#1e3c72"
                 )
-                st.plotly_chart(fig_ewallet, use_container_width=True)
+                payload.plotly_chart(fig_ewallet, "fig_ewallet")
+
+    # ==================== SEBARAN KUANTIL ====================
+    st.markdown('<div class="section-header"><h3>Median & Persentil Atas (P90 / P99)</h3></div>', unsafe_allow_html=True)
+    note_unweighted("kuantil dihitung dari sketsa per sel provinsi × gender yang tidak menyimpan bobot")
+
+    cell_sketches = data["cell_sketches"]
+    metric_by_label = {label: metric for metric, label in QUANTILE_METRICS.items()}
+    selected_metric = metric_by_label[st.selectbox("Pilih Metrik", list(metric_by_label))]
+
+    def in_filter(key):
+        province, gender = key
+        return (selected_prov == "Semua" or province == selected_prov) and \
+            (selected_gender == "Semua" or gender == selected_gender)
+
+    # Metrik berbentuk rentang Rupiah: kuantil adalah estimasi berbasis rentang, ditampilkan sebagai
+    # label rentang tempat nilai wakilnya jatuh (interpolasi "lower" agar selalu nilai wakil yang ada)
+    brackets = data["rupiah_brackets"].get(selected_metric)
+    bracket_label = {} if brackets is None else dict(zip(brackets["value"], brackets["label"]))
+    interpolation = "lower" if bracket_label else "linear"
+
+    def format_quantile(value):
+        if np.isnan(value):
+            return "-"
+        return bracket_label.get(value, f"Rp {value:,.0f}")
+
+    if advanced_filters:
+        # Filter lanjutan memotong sel provinsi × gender: kuantil dihitung dari baris terpilih
+        metric_values = df_filtered[selected_metric].dropna()
+        p50, p90, p99 = metric_values.quantile([0.5, 0.9, 0.99], interpolation=interpolation).to_numpy() \
+            if len(metric_values) else [np.nan] * 3
+    else:
+        # Filter provinsi/gender cukup menggabungkan beberapa sketsa sel
+        p50, p90, p99 = merged_sketch(cell_sketches, selected_metric, in_filter).quantiles([0.5, 0.9, 0.99])
+
+    q1, q2, q3 = st.columns(3)
+    for col, label, value in [(q1, "Median", p50), (q2, "Persentil 90", p90), (q3, "Persentil 99", p99)]:
+        col.markdown(f"""
+        <div class='stat-card'>
+            <div class='stat-label'>{label} {QUANTILE_METRICS[selected_metric]}{" (rentang)" if bracket_label else ""}</div>
+            <div class='stat-value'>{format_quantile(value)}</div>
+        </div>
+        """, unsafe_allow_html=True)
+    if bracket_label:
+        st.caption(
+            "Metrik ini dicatat sebagai rentang Rupiah: kuantil adalah estimasi berbasis rentang "
+            "(nilai tengah tiap rentang; rentang terbuka \"< …\" / \"> …\" memakai batasnya)."
+        )
+
+    prov_quantiles = []
+    if advanced_filters:
+        for province, values in df_filtered.dropna(subset=[selected_metric]).groupby("province")[selected_metric]:
+            med, top = values.quantile([0.5, 0.9], interpolation=interpolation)
+            prov_quantiles.append({"province": province, "Median": med, "P90": top})
+    else:
+        for province in sorted({key[0] for key in cell_sketches if in_filter(key)}):
+            sketch = merged_sketch(
+                cell_sketches, selected_metric,
+                lambda key: key[0] == province and in_filter(key)
+            )
+            if sketch.n:
+                med, top = sketch.quantiles([0.5, 0.9])
+                prov_quantiles.append({"province": province, "Median": med, "P90": top})
+
+    if prov_quantiles:
+        df_quant = pd.DataFrame(prov_quantiles).sort_values("Median", ascending=False)
+        fig_quant = go.Figure()
+        for stat, color in [("Median", "#1e3c72"), ("P90", "#5dade2")]:
+            fig_quant.add_trace(go.Bar(
+                x=df_quant["province"], y=df_quant[stat], name=stat, marker_color=color,
+                customdata=df_quant[stat].map(format_quantile),
+                hovertemplate=f"<b>%{{x}}</b><br>{stat}: %{{customdata}}<extra></extra>"
+            ))
+        fig_quant.update_layout(
+            title=f"Median & P90 {QUANTILE_METRICS[selected_metric]} per Provinsi",
+            barmode="group",
+            xaxis_title="Provinsi",
+            yaxis_title="Nilai (Rupiah, estimasi rentang)" if bracket_label else "Nilai (Rupiah)",
+            template="plotly_white",
+            legend=dict(orientation="h", yanchor="bottom", y=1.05, xanchor="center", x=0.5),
+            height=550,
+            margin=dict(t=80, b=100),
+            title_font_color="#1e3c72"
+        )
+        fig_quant.update_xaxes(tickangle=45, tickfont=dict(size=11))
+        payload.plotly_chart(fig_quant, "fig_quant")
 
     # ==================== HUBUNGAN PENDAPATAN VS PENGELUARAN ====================
     st.markdown('<div class="section-header"><h3>Hubungan Pendapatan vs Pengeluaran</h3></div>', unsafe_allow_html=True)
+    note_unweighted("tiap titik satu responden dan garis tren OLS dihitung tanpa bobot")
 
     fig5 = px.scatter(
         df_filtered,
@@ -512,71 +731,44 @@ with tab2:
         template="plotly_white"
     )
 
-    st.plotly_chart(fig5, use_container_width=True)
+    payload.plotly_chart(fig5, "fig5")
 
 # ==================== TAB 3 ====================
 with tab3:
     st.markdown('<div class="section-header"><h3>Analisis Literasi Keuangan</h3></div>', unsafe_allow_html=True)
 
-    # Normalisasi nama kolom
-    df_literacy.columns = df_literacy.columns.str.strip().str.replace(r'\s+', ' ', regex=True)
-
-    # Daftar item literasi keuangan
-    literacy_items = [
-        "I am able to identify risks and discrepancies and view numbers in a complex way",
-        "I am able to recognize a good financial investment",
-        "I am able to understand what is behind the numbers",
-        "I am able to and divide it accordingly across an allotted period to the right concerned areas",
-        "I am able to project the amount of cash that will be available to me in the future",
-        "I am able to plan ahead to avoid impulse spending",
-        "I am able to understand numbers and financial metrics",
-        "I am able to understand what drives cash flow and profits",
-        "I am able to understand the company's financial statements and some core performance measures",
-        "Awareness about the potential of financial risk in using digital financial provider or fintech such as the legality of the fintech provider interest rate and transaction fee",
-        "Having experience in using the product and service of fintech for digital payment",
-        "Experience in using the product and service of fintech for financing (loan) and investment",
-        "Experience in using the product and service of fintech for asset management",
-        "Having a good understanding of digital payment products such as E-Debit E-Credit  E-Money   Mobile/Internet banking  E -wallet",
-        "Having a good understanding of product digital asset management",
-        "Having a good understanding of digital alternatives",
-        "Having a good understanding of digital insurance",
-        "Having a good understanding of customer rights and protection as well as the procedure to complain about the service from digital  financial providers"
-    ]
+    lit_weights = df_literacy["survey_weight"].to_numpy() if use_weights else None
+
+    # Kolom item hasil pencocokan (abaikan tanda baca & spasi ganda), dihitung sekali di pipeline
+    items = data["literacy_items"]
+    matched_literacy = items["literacy"]
 
     # Terjemahan item
     translations_literacy = {
-        literacy_items[0]: "Kemampuan mengidentifikasi risiko dan memahami angka secara kompleks",
-        literacy_items[1]: "Kemampuan mengenali investasi keuangan yang baik",
-        literacy_items[2]: "Kemampuan memahami makna di balik angka",
-        literacy_items[3]: "Kemampuan membagi keuangan sesuai periode dan area yang tepat",
-        literacy_items[4]: "Kemampuan memperkirakan jumlah uang tunai di masa depan",
-        literacy_items[5]: "Kemampuan merencanakan keuangan untuk menghindari pengeluaran impulsif",
-        literacy_items[6]: "Pemahaman terhadap angka dan metrik keuangan",
-        literacy_items[7]: "Pemahaman terhadap faktor yang memengaruhi arus kas dan laba",
-        literacy_items[8]: "Pemahaman terhadap laporan keuangan dan indikator kinerja utama",
-        literacy_items[9]: "Kesadaran terhadap risiko keuangan dalam penggunaan fintech",
-        literacy_items[10]: "Pengalaman menggunakan fintech untuk pembayaran digital",
-        literacy_items[11]: "Pengalaman menggunakan fintech untuk pembiayaan dan investasi",
-        literacy_items[12]: "Pengalaman menggunakan fintech untuk pengelolaan aset",
-        literacy_items[13]: "Pemahaman produk pembayaran digital (e-money, e-wallet, mobile banking)",
-        literacy_items[14]: "Pemahaman produk pengelolaan aset digital",
-        literacy_items[15]: "Pemahaman terhadap alternatif digital",
-        literacy_items[16]: "Pemahaman terhadap produk asuransi digital",
-        literacy_items[17]: "Pemahaman terhadap hak konsumen dan prosedur pengaduan layanan fintech"
+        LITERACY_ITEMS[0]: "Kemampuan mengidentifikasi risiko dan memahami angka secara kompleks",
+        LITERACY_ITEMS[1]: "Kemampuan mengenali investasi keuangan yang baik",
+        LITERACY_ITEMS[2]: "Kemampuan memahami makna di balik angka",
+        LITERACY_ITEMS[3]: "Kemampuan membagi keuangan sesuai periode dan area yang tepat",
+        LITERACY_ITEMS[4]: "Kemampuan memperkirakan jumlah uang tunai di masa depan",
+        LITERACY_ITEMS[5]: "Kemampuan merencanakan keuangan untuk menghindari pengeluaran impulsif",
+        LITERACY_ITEMS[6]: "Pemahaman terhadap angka dan metrik keuangan",
+        LITERACY_ITEMS[7]: "Pemahaman terhadap faktor yang memengaruhi arus kas dan laba",
+        LITERACY_ITEMS[8]: "Pemahaman terhadap laporan keuangan dan indikator kinerja utama",
+        LITERACY_ITEMS[9]: "Kesadaran terhadap risiko keuangan dalam penggunaan fintech",
+        LITERACY_ITEMS[10]: "Pengalaman menggunakan fintech untuk pembayaran digital",
+        LITERACY_ITEMS[11]: "Pengalaman menggunakan fintech untuk pembiayaan dan investasi",
+        LITERACY_ITEMS[12]: "Pengalaman menggunakan fintech untuk pengelolaan aset",
+        LITERACY_ITEMS[13]: "Pemahaman produk pembayaran digital (e-money, e-wallet, mobile banking)",
+        LITERACY_ITEMS[14]: "Pemahaman produk pengelolaan aset digital",
+        LITERACY_ITEMS[15]: "Pemahaman terhadap alternatif digital",
+        LITERACY_ITEMS[16]: "Pemahaman terhadap produk asuransi digital",
+        LITERACY_ITEMS[17]: "Pemahaman terhadap hak konsumen dan prosedur pengaduan layanan fintech"
     }
 
-    # Pencocokan kolom fleksibel
-    matched_literacy = [col for item in literacy_items for col in df_literacy.columns if item.lower().strip() in col.lower().strip()]
-
     if len(matched_literacy) >= 10:
-        # Konversi ke numerik
-        df_literacy[matched_literacy] = df_literacy[matched_literacy].apply(pd.to_numeric, errors="coerce")
-
-        # Hitung skor rata-rata
-        df_literacy["avg_literacy_score"] = df_literacy[matched_literacy].mean(axis=1)
-        avg_literacy = df_literacy["avg_literacy_score"].mean()
+        avg_literacy = weighted_mean(df_literacy["avg_literacy_score"], lit_weights)
 
-        avg_scores = df_literacy[matched_literacy].mean().sort_values(ascending=False).reset_index()
+        avg_scores = weighted_column_means(df_literacy, matched_literacy, lit_weights).sort_values(ascending=False).reset_index()
         avg_scores.columns = ["Aspek", "Rata-rata Skor"]
 
         # Ringkasan umum
@@ -599,7 +791,7 @@ with tab3:
             title="Rata-rata Skor per Aspek Literasi Keuangan"
         )
         fig_lit.update_layout(template="plotly_white", xaxis_title="Skor (1–4)", yaxis_title="")
-        st.plotly_chart(fig_lit, use_container_width=True)
+        payload.plotly_chart(fig_lit, "fig_lit")
 
         # ==================== INSIGHT OTOMATIS ====================
         top_aspect = avg_scores.iloc[0]["Aspek"]
@@ -644,39 +836,6 @@ with tab3:
 
     st.markdown('<div class="section-header"><h3>Analisis Perilaku & Pengambilan Keputusan Keuangan</h3></div>', unsafe_allow_html=True)
 
-    # Normalisasi kolom
-    df_literacy.columns = df_literacy.columns.str.strip().str.replace(r'\s+', ' ', regex=True)
-
-    # ==================== DEFINISI ITEM ====================
-    behavior_items = [
-        "I take part in domestic expense planning", "I usually have a critical view of the way my friends deal with money",
-        "I like to participate in family decision making when we buy something expensive for home",
-        "I advise others on money matters", "I always try to save some money to do things I really like",
-        "I always like to negotiate prices when I buy", "I suggest at home that we keep money aside for emergencies",
-        "I keep an eye on promotions and discounts", "I like to think thoroughly before deciding to buy something",
-        "I like to research prices whenever I buy something", "I pay attention to news about the economy as it may affect my family",
-        "I often do things without giving them much thought", "I am impulsive", "I say things before I have thought them through"
-    ]
-
-    decision_items = [
-        "I am able to quickly change my financial decisions as per the changes in circumstance",
-        "Appraise of personal risk helps me in better financial decision making",
-        "I make sound financial decision by comparing results over the time",
-        "I make sound financial decisions by comparing results over expenses involved",
-        "I am able to search for economic options during financial decision making",
-        "I am able to foresee the long term and short-term consequences of the financial decisions I undertake",
-        "Previously used decision strategies help me in better financial decision making",
-        "I am becoming financially secure", "I am securing my financial future",
-        "I will achieve the financial goals that I have set for myself",
-        "I have saved (or will be able to save) enough money to last me to the end of my life",
-        "Because of my money situation I feel I will never have the things I want in life",
-        "I am behind with my finances", "My finances control my life",
-        "Whenever I feel in control of my finances something happens that sets me back",
-        "I am unable to enjoy life because I obsess too much about money"
-    ]
-
-    combined_items = behavior_items + decision_items
-
     # ==================== TRANSLASI ====================
     translations_behavior = {
         "I take part in domestic expense planning": "Berpartisipasi dalam perencanaan pengeluaran rumah tangga",
@@ -690,10 +849,11 @@ with tab3:
         "I like to think thoroughly before deciding to buy something": "Berpikir matang sebelum membeli",
         "I like to research prices whenever I buy something": "Membandingkan harga sebelum membeli",
         "I pay attention to news about the economy as it may affect my family": "Memperhatikan berita ekonomi yang berdampak pada keluarga",
-        "I am impulsive": "Cenderung impulsif",
-        "I often do things without giving them much thought": "Melakukan hal tanpa berpikir panjang",
-        "I say things before I have thought them through": "Sering bertindak sebelum mempertimbangkan dampaknya",
-        "I am unable to enjoy life because I obsess too much about money": "Sulit menikmati hidup karena terlalu fokus pada uang",
+        # Item berarah terbalik sudah di-reverse-code, sehingga skor tinggi = kondisi positif
+        "I am impulsive": "Tidak impulsif (skor dibalik)",
+        "I often do things without giving them much thought": "Berpikir dulu sebelum bertindak (skor dibalik)",
+        "I say things before I have thought them through": "Mempertimbangkan dampak sebelum berbicara (skor dibalik)",
+        "I am unable to enjoy life because I obsess too much about money": "Tetap menikmati hidup tanpa terobsesi uang (skor dibalik)",
         "I am able to foresee the long term and short-term consequences of the financial decisions I undertake": "Mampu memperkirakan dampak jangka pendek dan panjang keputusan keuangan",
         "I am becoming financially secure": "Mulai mencapai kestabilan finansial",
         "I am securing my financial future": "Menjamin masa depan finansial",
@@ -701,21 +861,15 @@ with tab3:
     }
 
     # ==================== PENCARIAN KOLOM ====================
-    matched_behavior = []
-    for item in combined_items:
-        match = [col for col in df_literacy.columns if item.lower().strip() in col.lower().strip()]
-        if match:
-            matched_behavior.append(match[0])
+    # Item negatif (mis. "I am impulsive") sudah dibalik (1↔4) di pipeline
+    matched_behavior = items["combined"]
+    reversed_items = items["reversed"]
 
     # ==================== ANALISIS ====================
     if len(matched_behavior) >= 10:
-        # Konversi semua kolom ke numerik agar bisa dihitung
-        df_literacy[matched_behavior] = df_literacy[matched_behavior].apply(pd.to_numeric, errors="coerce")
-
-        # Hitung skor rata-rata per responden dan per aspek
-        df_literacy["avg_behavior_score"] = df_literacy[matched_behavior].mean(axis=1)
-        avg_behavior = df_literacy["avg_behavior_score"].mean()
-        avg_scores_b = df_literacy[matched_behavior].mean().sort_values(ascending=False).reset_index()
+        # Skor rata-rata per responden (pipeline) dan per aspek
+        avg_behavior = weighted_mean(df_literacy["avg_behavior_score"], lit_weights)
+        avg_scores_b = weighted_column_means(df_literacy, matched_behavior, lit_weights).sort_values(ascending=False).reset_index()
         avg_scores_b.columns = ["Aspek", "Rata-rata Skor"]
         avg_scores_b["Rata-rata Skor"] = avg_scores_b["Rata-rata Skor"].fillna(0)
 
@@ -735,7 +889,7 @@ with tab3:
             title="Rata-rata Skor per Aspek Perilaku & Keputusan Keuangan"
         )
         fig_beh.update_layout(template="plotly_white", xaxis_title="Skor (1–4)", yaxis_title="")
-        st.plotly_chart(fig_beh, use_container_width=True)
+        payload.plotly_chart(fig_beh, "fig_beh")
 
         # ==================== INSIGHT OTOMATIS ====================
         top_aspect_b = avg_scores_b.iloc[0]["Aspek"]
@@ -761,92 +915,89 @@ with tab3:
     else:
         st.warning("Kolom perilaku dan pengambilan keputusan keuangan tidak lengkap ditemukan dalam dataset.")
 
-# ==================== TAB 4 : INTEGRASI & ANALISIS LANJUT ====================
-with tab4:
-    pio.templates.default = None
-    default_template = "none"
-
-    st.markdown('<div class="section-header"><h3>Analisis Lanjutan & Integrasi Dataset</h3></div>', 
-                unsafe_allow_html=True)
+    # ==================== RELIABILITAS & VALIDITAS KONSTRUK ====================
+    st.markdown('<div class="section-header"><h3>Reliabilitas & Validitas Konstruk</h3></div>', unsafe_allow_html=True)
+    note_unweighted("momen item untuk Cronbach's Alpha dan analisis faktor dihitung tanpa bobot")
 
-    # =========================================================
-    # RENAME KOLOM DF_REGIONAL
-    # =========================================================
-    df_regional = df_regional.rename(columns={
-        "Provinsi": "province",
-        "PDRB (Ribu Rp)": "pdrb_thousand_rp",
-        "Outstanding Pinjaman (Rp miliar)": "outstanding_billion",
-        "Jumlah Penerima Pinjaman (akun)": "borrowers",
-        "Jumlah Dana yang Diberikan (Rp miliar)": "loan_amount_billion",
-        "Urbanisasi (%)": "urbanization_rate",
-        "TWP 90%": "twp_90"
-    })
+    # Nama tampilan -> kunci skala pada momen item (listwise per skala, bukan gabungan 48 item)
+    constructs = {
+        "Literasi Keuangan": "literacy",
+        "Perilaku Keuangan": "behavior",
+        "Pengambilan Keputusan": "decision",
+    }
+    moments = data["item_moments"]
 
-    # =========================================================
-    # RENAME KOLOM DF_LITERACY — FIX ERROR
-    # =========================================================
-    if "Province of Origin" in df_literacy.columns:
-        df_literacy = df_literacy.rename(columns={"Province of Origin": "province"})
+    if moments["scales"]:
+        cells = moments["cells"]
 
-    # =========================================================
-    # CLEANING NUMERIC COLUMNS (ANTI ERROR)
-    # =========================================================
-    def clean_numeric(series):
-        if series is None:
-            return None
-        return (
-            series.astype(str)
-            .str.replace(r"[^0-9\.,-]", "", regex=True)
-            .str.replace(r"\.(?=.*\.)", "", regex=True)
-            .str.replace(",", ".", regex=False)
-            .replace("", None)
-            .astype(float)
+        subgroup_options = (
+            ["Semua"]
+            + [f"Gender: {g}" for g in sorted(cells["Gender"].unique())]
+            + [f"Provinsi: {p}" for p in sorted(cells["Province of Origin"].unique())]
         )
+        selected_subgroup = st.selectbox("Subkelompok Responden", subgroup_options)
+
+        cell_mask = None
+        if selected_subgroup.startswith("Gender: "):
+            cell_mask = (cells["Gender"] == selected_subgroup[len("Gender: "):]).to_numpy()
+        elif selected_subgroup.startswith("Provinsi: "):
+            cell_mask = (cells["Province of Origin"] == selected_subgroup[len("Provinsi: "):]).to_numpy()
+
+        summary, item_stats, loadings = construct_diagnostics(moments, constructs, cell_mask)
+        too_small = summary[summary["N"] < summary["N Minimum"]]
+        if not too_small.empty:
+            st.info(
+                "Diagnostik tidak ditampilkan untuk "
+                + ", ".join(f"{row['Konstruk']} (N={row['N']})" for _, row in too_small.iterrows())
+                + f": subkelompok terlalu kecil setelah responden dengan jawaban tidak lengkap dibuang "
+                f"(minimal {MIN_DIAGNOSTIC_N} responden dan lebih banyak dari jumlah item)."
+            )
+        # N = responden lengkap untuk skala itu saja, sehingga bisa berbeda antar konstruk
+        st.dataframe(summary.round(3), use_container_width=True, hide_index=True)
 
-    numeric_cols_regional = [
-        "pdrb_thousand_rp",
-        "outstanding_billion",
-        "borrowers",
-        "urbanization_rate",
-        "loan_amount_billion",
-        "twp_90"
-    ]
+        with st.expander("Korelasi item-total per konstruk"):
+            st.dataframe(item_stats.round(3), use_container_width=True, hide_index=True)
 
-    for col in numeric_cols_regional:
-        if col in df_regional.columns:
-            df_regional[col] = clean_numeric(df_regional[col])
+        with st.expander("Analisis faktor eksploratori (principal axis, rotasi varimax)"):
+            for name, table in loadings.items():
+                st.markdown(f"**{name}**")
+                st.dataframe(table.round(3), use_container_width=True)
 
-    if "avg_monthly_income" in df_profile.columns:
-        df_profile["avg_monthly_income"] = clean_numeric(df_profile["avg_monthly_income"])
+        weak = item_stats[item_stats["Korelasi Item-Total"] < 0.3] if not item_stats.empty else item_stats
+        st.markdown(f"""
+        <div class='insight-box'>
+            <h4>💡 Catatan Psikometrik</h4>
+            <p>Sebanyak <b>{len(reversed_items)}</b> item berarah negatif telah di-<i>reverse-code</i> sebelum skor rata-rata dihitung.</p>
+            <p>Cronbach's Alpha ≥ 0.70 menandakan konsistensi internal yang memadai. Terdapat <b>{len(weak)}</b> item dengan korelasi item-total &lt; 0.30 pada subkelompok ini.</p>
+        </div>
+        """, unsafe_allow_html=True)
 
-    # =========================================================
-    # BUAT SKOR LITERASI (RATA-RATA SEMUA ITEM SKALA 1–4)
-    # =========================================================
-    literacy_columns = [
-        col for col in df_literacy.columns
-        if df_literacy[col].dtype != "object" and col not in ["Year of Birth"]
-    ]
+# ==================== TAB 4 : INTEGRASI & ANALISIS LANJUT ====================
+with tab4:
+    pio.templates.default = None
+    default_template = "none"
 
-    if len(literacy_columns) > 0:
-        df_literacy["literacy_score"] = df_literacy[literacy_columns].mean(axis=1)
+    st.markdown('<div class="section-header"><h3>Analisis Lanjutan & Integrasi Dataset</h3></div>', 
+                unsafe_allow_html=True)
 
-    # =========================================================
-    # 1. CLEAN UNTUK PLOT SCATTER
-    # =========================================================
-    df_regional_clean = df_regional.dropna(subset=[
-        "pdrb_thousand_rp",
-        "outstanding_billion",
-        "borrowers",
-        "urbanization_rate"
-    ])
+    # Grafik 1–4 hanya bergantung pada versi data (dan tampilan provinsi untuk grafik 4):
+    # dibangun sekali per proses lewat cache grafik, bukan per sesi per rerun
 
     # =========================================================
     # 1. PDRB vs Outstanding Pinjaman
     # =========================================================
     st.subheader("PDRB vs Outstanding Pinjaman")
 
-    if not df_regional_clean.empty:
-        fig1 = px.scatter(
+    def build_fig1():
+        df_regional_clean = df_regional.dropna(subset=[
+            "pdrb_thousand_rp",
+            "outstanding_billion",
+            "borrowers",
+            "urbanization_rate"
+        ])
+        if df_regional_clean.empty:
+            return None
+        return px.scatter(
             df_regional_clean,
             x="pdrb_thousand_rp",
             y="outstanding_billion",
@@ -861,7 +1012,10 @@ with tab4:
             },
             template=default_template
         )
-        st.plotly_chart(fig1, use_container_width=True)
+
+    fig1 = cached_figure("fig1", (), build_fig1)
+    if fig1 is not None:
+        payload.plotly_chart(fig1, "fig1")
     else:
         st.warning("Data tidak cukup untuk menampilkan scatter plot.")
 
@@ -870,10 +1024,11 @@ with tab4:
     # =========================================================
     st.subheader("Urbanisasi vs Dana yang Diberikan")
 
-    df_clean2 = df_regional.dropna(subset=["urbanization_rate", "loan_amount_billion"])
-
-    if not df_clean2.empty:
-        fig2 = px.scatter(
+    def build_fig2():
+        df_clean2 = df_regional.dropna(subset=["urbanization_rate", "loan_amount_billion"])
+        if df_clean2.empty:
+            return None
+        return px.scatter(
             df_clean2,
             x="urbanization_rate",
             y="loan_amount_billion",
@@ -886,19 +1041,24 @@ with tab4:
             },
             template=default_template
         )
-        st.plotly_chart(fig2, use_container_width=True)
+
+    fig2 = cached_figure("fig2", (), build_fig2)
+    if fig2 is not None:
+        payload.plotly_chart(fig2, "fig2")
     else:
         st.warning("Data tidak cukup untuk menampilkan scatter plot Urbanisasi vs Dana.")
 
-            # =========================================================
+    # =========================================================
     # 3. Integrasi PDRB vs Pendapatan Gen Z (Grouped Bar Chart)
     # =========================================================
     st.subheader("Integrasi: PDRB vs Pendapatan Rata-rata Gen Z (Bar Chart Gabungan)")
+    note_unweighted("pendapatan Gen Z ditampilkan per responden tanpa bobot")
 
-    df_merge_profile = df_regional.merge(df_profile, on="province", how="left")
-    df_merge_profile = df_merge_profile.dropna(subset=["pdrb_thousand_rp", "avg_monthly_income"])
-
-    if not df_merge_profile.empty:
+    def build_fig3():
+        df_merge_profile = df_regional.merge(df_profile, on="province", how="left")
+        df_merge_profile = df_merge_profile.dropna(subset=["pdrb_thousand_rp", "avg_monthly_income"])
+        if df_merge_profile.empty:
+            return None
         df_plot = df_merge_profile.sort_values("pdrb_thousand_rp", ascending=False)
 
         df_long = pd.melt(
@@ -909,7 +1069,7 @@ with tab4:
             value_name="nilai"
         )
 
-        fig3 = px.bar(
+        return px.bar(
             df_long,
             x="province",
             y="nilai",
@@ -926,7 +1086,10 @@ with tab4:
             },
             template=default_template
         )
-        st.plotly_chart(fig3, use_container_width=True)
+
+    fig3 = cached_figure("fig3", (), build_fig3)
+    if fig3 is not None:
+        payload.plotly_chart(fig3, "fig3")
     else:
         st.warning("Data tidak cukup untuk menampilkan integrasi PDRB vs Pendapatan Gen Z.")
 
@@ -934,14 +1097,29 @@ with tab4:
     # 4. Integrasi Literasi vs Risiko Kredit (BAR CHART HORIZONTAL)
     # =========================================================
     st.subheader("Integrasi: Literacy vs Risiko Kredit (TWP 90%) — Bar Chart")
+    note_unweighted("skor literasi ditampilkan per responden (peta: rata-rata provinsi) tanpa bobot")
 
-    df_merge_literacy = df_regional.merge(df_literacy, on="province", how="left")
-    df_merge_literacy = df_merge_literacy.dropna(subset=["literacy_score", "twp_90"])
+    def build_fig4():
+        df_merge_literacy = df_regional.merge(
+            df_literacy, left_on="province", right_on="Province of Origin", how="left"
+        )
+        df_merge_literacy = df_merge_literacy.dropna(subset=["literacy_score", "twp_90"])
 
-    # Urutkan berdasarkan skor literasi tertinggi → terendah
-    df_plot4 = df_merge_literacy.sort_values("literacy_score", ascending=True)
+        # Urutkan berdasarkan skor literasi tertinggi → terendah
+        df_plot4 = df_merge_literacy.sort_values("literacy_score", ascending=True)
+
+        if df_plot4.empty:
+            return None
+        if province_view == "Peta Choropleth":
+            df_map4 = df_plot4.groupby("province")["literacy_score"].mean().reset_index()
+            return province_map(
+                df_map4["province"],
+                df_map4["literacy_score"],
+                title="Rata-rata Skor Literasi per Provinsi",
+                hover_label="Skor Literasi (1–4)",
+                value_format=".2f"
+            )
 
-    if not df_plot4.empty:
         fig4 = px.bar(
             df_plot4,
             x="literacy_score",
@@ -963,7 +1141,125 @@ with tab4:
             yaxis_title="Provinsi",
             coloraxis_colorbar=dict(title="TWP 90%")
         )
+        return fig4
 
-        st.plotly_chart(fig4, use_container_width=True)
+    fig4 = cached_figure("fig4", (province_view, geo_mtime), build_fig4)
+    if fig4 is not None:
+        payload.plotly_chart(fig4, "fig4")
     else:
         st.warning("Data tidak cukup untuk menampilkan integrasi Literacy vs Risiko Kredit.")
+
+    # =========================================================
+    # 5. Tren Antar-Periode (Snapshot Bulanan)
+    # =========================================================
+    st.subheader("Tren Antar-Periode Indikator Regional")
+
+    summary_path = os.path.join(SNAPSHOT_DIR, SUMMARY_FILE)
+    summary_mtime = os.path.getmtime(summary_path) if os.path.exists(summary_path) else 0
+    df_periods = load_regional_summaries(SNAPSHOT_DIR, summary_mtime)
+
+    snapshot_ingest = data["regional_snapshot"]
+    if snapshot_ingest["status"] == INGEST_CONFLICT:
+        st.warning(
+            f"File regional berisi data berbeda dari snapshot periode {snapshot_ingest['period']} yang sudah "
+            "tersimpan; data lama dipertahankan. Set `REGIONAL_PERIOD` ke periode file ini, atau timpa "
+            "dengan `python snapshots.py ingest <file.csv> --period YYYY-MM --force`."
+        )
+
+    if len(df_periods) < 2:
+        st.info(
+            f"Baru {len(df_periods)} periode tersimpan. Tren, selisih, dan pertumbuhan tampil setelah "
+            "snapshot periode berikutnya masuk (otomatis saat file regional diperbarui dan "
+            "`REGIONAL_PERIOD=YYYY-MM` diset, atau lewat `python snapshots.py ingest <file.csv> --period YYYY-MM`)."
+        )
+    else:
+        trend_by_label = {label: metric for metric, label in TREND_METRICS.items()}
+        trend_label = st.selectbox("Indikator Tren", list(trend_by_label))
+        trend_metric = trend_by_label[trend_label]
+        value_format = ",.2f" if trend_metric == "twp_90" else ",.0f"
+
+        if selected_prov == "Semua":
+            # Nasional: cukup ringkasan per periode, tanpa membaca partisi
+            scope = "Nasional"
+            df_trend = period_changes(df_periods, trend_metric)
+        else:
+            scope = selected_prov
+            df_trend = period_changes(
+                load_snapshot_partitions(SNAPSHOT_DIR, None, (selected_prov,), ("province", trend_metric), summary_mtime),
+                trend_metric
+            )
+
+        if df_trend.empty:
+            st.warning(f"Belum ada snapshot untuk {scope}.")
+        else:
+            latest = df_trend.iloc[-1]
+            t1, t2, t3 = st.columns(3)
+            for col, label, value in [
+                (t1, f"{trend_label} ({latest['period']})", f"{latest[trend_metric]:{value_format}}"),
+                (t2, "Selisih vs Periode Sebelumnya", "-" if pd.isna(latest["delta"]) else f"{latest['delta']:+{value_format}}"),
+                (t3, "Pertumbuhan", "-" if pd.isna(latest["growth_pct"]) else f"{latest['growth_pct']:+.1f}%"),
+            ]:
+                col.markdown(f"""
+                <div class='stat-card'>
+                    <div class='stat-label'>{label}</div>
+                    <div class='stat-value'>{value}</div>
+                </div>
+                """, unsafe_allow_html=True)
+
+            fig_trend = px.line(
+                df_trend,
+                x="period",
+                y=trend_metric,
+                markers=True,
+                hover_data={"delta": ":" + value_format, "growth_pct": ":.1f"},
+                labels={
+                    "period": "Periode",
+                    trend_metric: trend_label,
+                    "delta": "Selisih",
+                    "growth_pct": "Pertumbuhan (%)"
+                },
+                title=f"Tren {trend_label} — {scope}",
+                template=default_template
+            )
+            fig_trend.update_traces(line_color="#1e3c72")
+            payload.plotly_chart(fig_trend, "fig_trend")
+
+        # Pertumbuhan per provinsi: cukup dua partisi periode terakhir
+        last_periods = tuple(df_periods["period"].iloc[-2:])
+        df_growth = period_changes(
+            load_snapshot_partitions(SNAPSHOT_DIR, last_periods, None, ("province", trend_metric), summary_mtime),
+            trend_metric,
+            group_col="province"
+        )
+        df_growth = df_growth[df_growth["period"] == last_periods[-1]].dropna(subset=["growth_pct"])
+
+        if not df_growth.empty:
+            fig_growth = px.bar(
+                df_growth.sort_values("growth_pct"),
+                x="growth_pct",
+                y="province",
+                orientation="h",
+                color="growth_pct",
+                color_continuous_scale="RdBu",
+                color_continuous_midpoint=0,
+                labels={"growth_pct": "Pertumbuhan (%)", "province": "Provinsi"},
+                title=f"Pertumbuhan {trend_label} per Provinsi ({last_periods[0]} → {last_periods[-1]})",
+                template=default_template
+            )
+            fig_growth.update_layout(height=800)
+            payload.plotly_chart(fig_growth, "fig_growth")
+
+# ==================== UKURAN PAYLOAD GRAFIK ====================
+payload.report()
+
+# ==================== WAKTU TAHAP PIPELINE ====================
+with st.expander("Waktu Tahap Pipeline Data"):
+    st.dataframe(data["timings"].round({"Durasi (ms)": 1}), use_container_width=True, hide_index=True)
+    st.caption("Tahap dihitung ulang hanya bila file sumber di hulunya berubah; selebihnya diambil dari cache.")
+
+# ==================== AKUNTANSI MEMORI SESI ====================
+# Byte yang ditahan sesi ini pada rerun terakhir (ditampilkan di halaman ?admin=1)
+GOVERNOR.record_session(current_session_id(), {
+    "Data Terfilter": estimate_bytes(df_filtered),
+    "Grafik": payload.total_bytes,
+})
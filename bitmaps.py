@@ -0,0 +1,60 @@
+import numpy as np
+import pandas as pd
+
+# ==================== INDEKS BITMAP PER NILAI KATEGORI ====================
+# Tiap nilai kategori punya bitmap baris (1 bit per baris, dikemas ke word uint64).
+# Kombinasi filter apa pun = OR antar-nilai dalam satu kolom, AND antar-kolom;
+# jumlah baris cukup dihitung dengan popcount sebelum agregasi dijalankan.
+WORD_BITS = 64
+POPCOUNT_TABLE = np.array([bin(i).count("1") for i in range(256)], dtype=np.uint8)
+
+
+def _pack_rows(masks):
+    # masks: bool (n_bitmap, n_rows) -> uint64 (n_bitmap, n_words), bit ke-i = baris ke-i
+    masks = np.atleast_2d(masks)
+    n_words = -(-masks.shape[1] // WORD_BITS)
+    packed_bytes = np.packbits(masks, axis=1, bitorder="little")
+    packed = np.zeros((masks.shape[0], n_words * 8), dtype=np.uint8)
+    packed[:, :packed_bytes.shape[1]] = packed_bytes
+    return packed.view(np.uint64)
+
+
+def build_bitmap_index(df, columns, sort_keys=None):
+    sort_keys = sort_keys or {}
+    index = {"n_rows": len(df), "columns": {}}
+    for col in columns:
+        values = sorted(df[col].dropna().unique().tolist(), key=sort_keys.get(col))
+        codes = pd.Categorical(df[col], categories=values).codes
+        masks = codes[None, :] == np.arange(len(values))[:, None]
+        index["columns"][col] = {"values": values, "bitmaps": _pack_rows(masks)}
+    return index
+
+
+def all_rows(index):
+    return _pack_rows(np.ones(index["n_rows"], dtype=bool))[0]
+
+
+def select_values(index, column, values):
+    entry = index["columns"][column]
+    wanted = set(values)
+    positions = [i for i, value in enumerate(entry["values"]) if value in wanted]
+    if not positions:
+        return np.zeros(entry["bitmaps"].shape[1], dtype=np.uint64)
+    return np.bitwise_or.reduce(entry["bitmaps"][positions], axis=0)
+
+
+def resolve(index, selections):
+    # selections: {kolom: daftar nilai}; None / daftar kosong = kolom tidak difilter
+    bitmap = all_rows(index)
+    for column, values in selections.items():
+        if values:
+            bitmap &= select_values(index, column, values)
+    return bitmap
+
+
+def popcount(bitmap):
+    return int(POPCOUNT_TABLE[bitmap.view(np.uint8)].sum(dtype=np.int64))
+
+
+def bitmap_positions(bitmap, n_rows):
+    return np.flatnonzero(np.unpackbits(bitmap.view(np.uint8), count=n_rows, bitorder="little"))
@@ -0,0 +1,194 @@
+import argparse
+import hashlib
+import os
+import pickle
+import shutil
+import tempfile
+import time
+
+import pandas as pd
+import pyarrow as pa
+
+from datasets import build_pipeline
+
+try:
+    import fcntl
+except ImportError:  # Windows: tanpa kunci antar-proses
+    fcntl = None
+
+# ==================== DATA PLANE BERSAMA (READ-ONLY) ====================
+# Satu proses loader menerbitkan hasil pipeline ke file Arrow IPC di memori bersama
+# (/dev/shm bila ada). Setiap worker Streamlit memetakan file yang sama lewat mmap, sehingga
+# kolom numerik & string tidak disalin per proses. Tiap terbitan berada di direktori versinya
+# sendiri; pointer CURRENT diganti secara atomik (swap versi).
+DATA_PLANE_DIR = os.environ.get(
+    "DATA_PLANE_DIR",
+    os.path.join("/dev/shm" if os.path.isdir("/dev/shm") else tempfile.gettempdir(), "genz-dataplane"),
+)
+PLANE_TABLES = ("profile", "literacy", "regional")
+PLANE_AGGREGATES = (
+    "literacy_items", "cell_sketches", "item_moments", "regional_snapshot", "profile_bitmaps", "rupiah_brackets",
+    "weighting_report",
+)
+KEEP_VERSIONS = 2
+
+CURRENT_FILE = "CURRENT"
+LOCK_FILE = "publish.lock"
+AGGREGATES_FILE = "aggregates.pkl"
+BUFFER_ALIGNMENT = 64
+
+
+# ==================== TABEL ARROW ====================
+def _arrow_column(series):
+    if series.dtype.kind in "iuf":
+        # NaN tetap NaN (tanpa bitmap null) agar bisa dibaca ulang tanpa salinan
+        return pa.array(series.to_numpy(), from_pandas=False)
+    return pa.array(series, from_pandas=True)
+
+
+def write_table(df, path):
+    # Indeks tidak disimpan: tabel dibaca kembali dengan RangeIndex
+    table = pa.table({str(col): _arrow_column(df[col]) for col in df.columns})
+    with pa.OSFile(path, "wb") as sink, pa.ipc.new_file(sink, table.schema) as writer:
+        writer.write_table(table)
+
+
+def read_table(path):
+    # mmap + split_blocks: kolom numerik tanpa null & kolom string (string[pyarrow])
+    # menunjuk langsung ke halaman memori bersama
+    table = pa.ipc.open_file(pa.memory_map(path, "r")).read_all()
+    return table.to_pandas(
+        split_blocks=True,
+        types_mapper={pa.string(): pd.StringDtype("pyarrow")}.get,
+    )
+
+
+# ==================== AGREGAT (PICKLE + BUFFER) ====================
+def write_objects(obj, path):
+    # Pickle protokol 5: larik numpy (sketsa, momen item) ditulis di luar pickle ke file
+    # buffer, rata 64 byte, agar bisa dipetakan kembali tanpa salinan
+    buffers = []
+    meta = pickle.dumps(obj, protocol=5, buffer_callback=buffers.append)
+    offsets = []
+    with open(path + ".buf", "wb") as f:
+        for buffer in buffers:
+            raw = buffer.raw()
+            f.write(b"\0" * (-f.tell() % BUFFER_ALIGNMENT))
+            offsets.append((f.tell(), raw.nbytes))
+            f.write(raw)
+    with open(path, "wb") as f:
+        pickle.dump((meta, offsets), f, protocol=5)
+
+
+def read_objects(path):
+    with open(path, "rb") as f:
+        meta, offsets = pickle.load(f)
+    mapped = pa.memory_map(path + ".buf", "r").read_buffer() if offsets else None
+    return pickle.loads(meta, buffers=[mapped.slice(offset, size) for offset, size in offsets])
+
+
+# ==================== VERSI & PENERBITAN ====================
+def plane_version(pipeline):
+    versions = pipeline.versions(PLANE_TABLES + PLANE_AGGREGATES)
+    key = [versions[name] for name in PLANE_TABLES + PLANE_AGGREGATES]
+    return hashlib.sha1(repr(key).encode()).hexdigest()[:12]
+
+
+def current_version(root=DATA_PLANE_DIR):
+    try:
+        with open(os.path.join(root, CURRENT_FILE), encoding="utf-8") as f:
+            return f.read().strip() or None
+    except FileNotFoundError:
+        return None
+
+
+def _prune(root, keep):
+    # Versi lama dihapus; worker yang masih memetakan file lama tetap aman (POSIX unlink)
+    versions = sorted(
+        (entry for entry in os.scandir(root) if entry.is_dir() and not entry.name.startswith(".")),
+        key=lambda entry: entry.stat().st_mtime,
+    )
+    for entry in versions[:-keep]:
+        shutil.rmtree(entry.path, ignore_errors=True)
+
+
+def publish(pipeline, root=DATA_PLANE_DIR, keep=KEEP_VERSIONS):
+    os.makedirs(root, exist_ok=True)
+    version = plane_version(pipeline)
+    target = os.path.join(root, version)
+    if not os.path.isdir(target):
+        # Hasil pipeline (termasuk tahap antara) hanya dibutuhkan di memori sampai tertulis ke data
+        # plane; setelah itu dilepas agar proses penerbit tidak menahan salinan privat di samping
+        # mmap. Hasil tiap node tetap ada di cache disk pipeline, sehingga penerbitan berikutnya
+        # hanya menghitung node yang hulunya berubah.
+        try:
+            results = pipeline.run(PLANE_TABLES + PLANE_AGGREGATES)
+            staging = tempfile.mkdtemp(prefix=".staging-", dir=root)
+            for name in PLANE_TABLES:
+                write_table(results[name], os.path.join(staging, f"{name}.arrow"))
+            aggregates = {name: results[name] for name in PLANE_AGGREGATES}
+            aggregates["timings"] = pipeline.timings()
+            write_objects(aggregates, os.path.join(staging, AGGREGATES_FILE))
+            os.rename(staging, target)
+        finally:
+            results = aggregates = None
+            pipeline.release()
+
+    pointer = os.path.join(root, f".{CURRENT_FILE}.{os.getpid()}")
+    with open(pointer, "w", encoding="utf-8") as f:
+        f.write(version)
+    os.replace(pointer, os.path.join(root, CURRENT_FILE))
+    _prune(root, keep)
+    return version
+
+
+def ensure_published(pipeline, root=DATA_PLANE_DIR):
+    # Dipanggil tiap rerun: cukup stat file sumber + baca CURRENT. Bila versi berbeda,
+    # satu proses (pemegang kunci) menerbitkan; proses lain menunggu lalu memakai hasilnya.
+    version = plane_version(pipeline)
+    if current_version(root) == version:
+        return version
+
+    os.makedirs(root, exist_ok=True)
+    with open(os.path.join(root, LOCK_FILE), "w") as lock:
+        if fcntl is not None:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+        try:
+            if current_version(root) == version:
+                return version
+            return publish(pipeline, root)
+        finally:
+            if fcntl is not None:
+                fcntl.flock(lock, fcntl.LOCK_UN)
+
+
+def attach(version, root=DATA_PLANE_DIR):
+    path = os.path.join(root, version)
+    plane = {name: read_table(os.path.join(path, f"{name}.arrow")) for name in PLANE_TABLES}
+    plane.update(read_objects(os.path.join(path, AGGREGATES_FILE)))
+    plane["version"] = version
+    return plane
+
+
+# ==================== PROSES LOADER ====================
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Terbitkan data dashboard ke data plane memori bersama.")
+    parser.add_argument("--root", default=DATA_PLANE_DIR)
+    parser.add_argument("--watch", type=float, default=0,
+                        help="periksa ulang file sumber tiap N detik (0 = terbitkan sekali)")
+    args = parser.parse_args(argv)
+
+    pipeline = build_pipeline()
+    published = None
+    while True:
+        version = ensure_published(pipeline, args.root)
+        if version != published:
+            print(f"Data plane versi {version} di {args.root}")
+            published = version
+        if not args.watch:
+            break
+        time.sleep(args.watch)
+
+
+if __name__ == "__main__":
+    main()
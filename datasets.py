@@ -0,0 +1,345 @@
+import os
+import re
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.csv as pa_csv
+
+from bitmaps import build_bitmap_index
+from pipeline import PIPELINE_CACHE_DIR, Pipeline
+from provinces import canonical_province
+from psychometrics import (
+    BEHAVIOR_ITEMS,
+    DECISION_ITEMS,
+    LITERACY_ITEMS,
+    REVERSE_KEYED_ITEMS,
+    match_items,
+    reverse_code,
+    scale_moments,
+)
+from sketches import build_cell_sketches
+from snapshots import ingest_snapshot, snapshot_period
+from weighting import REFERENCE_YEAR, survey_weights
+
+# ==================== FILE SUMBER ====================
+# Path relatif terhadap direktori kerja, sama seperti saat `streamlit run app.py`
+DATA_PATHS = {
+    "profile": "GenZ_Financial_Profile.csv",
+    "literacy": "GenZ_Financial_Literacy_Survey.csv",
+    "regional": "Regional_Economic_Indicators.csv",
+}
+
+REGIONAL_COLUMNS = {
+    "provinsi": "province",
+    "jumlah rekening penerima pinjaman aktif (entitas)": "active_loan_accounts",
+    "jumlah dana yang diberikan (rp miliar)": "loan_amount_billion",
+    "jumlah rekening pemberi pinjaman (akun)": "lender_accounts",
+    "twp 90%": "twp_90",
+    "jumlah penerima pinjaman (akun)": "borrowers",
+    "outstanding pinjaman (rp miliar)": "outstanding_billion",
+    "jumlah penduduk (ribu)": "population_thousand",
+    "pdrb (ribu rp)": "pdrb_thousand_rp",
+    "urbanisasi (%)": "urbanization_rate",
+}
+
+QUANTILE_METRICS = {
+    "avg_monthly_income": "Pendapatan Bulanan",
+    "avg_monthly_expense": "Pengeluaran Bulanan",
+    "outstanding_loan": "Outstanding Pinjaman",
+    "ewallet_spending": "Belanja E-Wallet",
+}
+
+# Kolom profil yang dicatat sebagai label rentang Rupiah
+RUPIAH_COLUMNS = ["avg_monthly_income", "avg_monthly_expense", "ewallet_spending"]
+# Label rentang asli tiap kolom Rupiah (kolom aslinya diganti nilai tengah rentang)
+RUPIAH_LABEL_COLUMNS = {
+    "avg_monthly_income": "income_bucket",
+    "avg_monthly_expense": "expense_bucket",
+    "ewallet_spending": "ewallet_bucket",
+}
+
+# Dimensi filter sidebar (diindeks bitmap) beserta labelnya
+FILTER_DIMENSIONS = {
+    "province": "Provinsi",
+    "gender": "Jenis Kelamin",
+    "education_level": "Pendidikan",
+    "employment_status": "Status Pekerjaan",
+    "main_fintech_app": "Aplikasi Fintech Utama",
+    "investment_type": "Jenis Investasi",
+    "loan_usage_purpose": "Tujuan Pinjaman",
+    "income_bucket": "Rentang Pendapatan",
+    "birth_year": "Tahun Lahir",
+}
+
+# File CSV sebesar ini (atau lebih) dibaca dengan parser Arrow multi-core; bisa diubah lewat env
+PARALLEL_READ_BYTES = int(float(os.environ.get("PARALLEL_READ_MB", 64)) * 1024 ** 2)
+# Nilai kosong diperlakukan sama dengan pd.read_csv (termasuk sel teks kosong -> NaN)
+CSV_CONVERT = pa_csv.ConvertOptions(
+    null_values=[*pa_csv.ConvertOptions().null_values, "<NA>", "None"],
+    strings_can_be_null=True,
+)
+
+# Kolom survei literasi yang bukan item skala 1–4
+LITERACY_NON_ITEMS = {"Year of Birth", "survey_weight", "avg_literacy_score", "avg_behavior_score"}
+
+
+# ==================== FUNGSI PEMBERSIHAN (VEKTOR) ====================
+def _decode_latin1(column):
+    # Decode Python hanya untuk nilai unik; pemetaan ke semua baris tetap di Arrow (hash, C++)
+    uniques = pc.unique(column)
+    decoded = pa.array(
+        [None if value is None else value.decode("ISO-8859-1") for value in uniques.to_pylist()], pa.string()
+    )
+    return decoded.take(pc.index_in(column, value_set=uniques))
+
+
+def _pandas_column_names(names):
+    # Penamaan kolom parser C pandas: header kosong -> "Unnamed: i", duplikat -> "a", "a.1", ...
+    names = [name or f"Unnamed: {i}" for i, name in enumerate(names)]
+    counts = {}
+    for i, name in enumerate(names):
+        count = counts.get(name, 0)
+        while count > 0:
+            counts[name] = count + 1
+            name = f"{name}.{count}"
+            count = counts.get(name, 0)
+        names[i] = name
+        counts[name] = count + 1
+    return names
+
+
+def read_csv_parallel(path):
+    # Parser Arrow memotong file menjadi blok byte di batas baris, mem-parse & memvalidasi UTF-8
+    # blok serentak di semua core (tanpa GIL), lalu kolom bertipe per blok digabung langsung ke
+    # DataFrame. Encoding lain (encoding="ISO-8859-1") melewati codec Python satu thread, jadi
+    # file selalu dibaca sebagai UTF-8: ekspor survei Windows-1252/Latin-1 (mis. "Parent\x92s
+    # House") hanya membuat beberapa kolom teks terbaca sebagai bytes, dan kolom itu di-decode
+    # Latin-1 per nilai unik.
+    table = pa_csv.read_csv(path, parse_options=pa_csv.ParseOptions(delimiter=";"), convert_options=CSV_CONVERT)
+    for i, field in enumerate(table.schema):
+        if pa.types.is_binary(field.type):
+            # Arrow tidak gagal pada teks non-UTF-8: kolomnya dibaca sebagai binary
+            table = table.set_column(i, field.name, _decode_latin1(table.column(i)))
+        elif pa.types.is_null(field.type):
+            # Kolom kosong total menjadi float NaN, seperti parser pandas
+            table = table.set_column(i, field.name, table.column(i).cast(pa.float64()))
+    df = table.rename_columns(_pandas_column_names(table.column_names)).to_pandas()
+    # Arrow mengembalikan None untuk teks kosong; pd.read_csv memberi NaN
+    for i in np.flatnonzero(df.dtypes == object):
+        column = df.iloc[:, i]
+        df.isetitem(i, column.where(column.notna(), np.nan))
+    return df
+
+
+def read_file(path):
+    if os.path.getsize(path) >= PARALLEL_READ_BYTES:
+        try:
+            return read_csv_parallel(path)
+        except UnicodeDecodeError:
+            # Header bukan UTF-8: Arrow tidak bisa memberi nama kolom, baca Latin-1 seperti biasa
+            return pd.read_csv(path, delimiter=";", encoding="ISO-8859-1")
+
+    try:
+        return pd.read_csv(path, delimiter=";", encoding="utf-8")
+    except UnicodeDecodeError:
+        return pd.read_csv(path, delimiter=";", encoding="ISO-8859-1")
+
+
+def export_columns(df):
+    # Ekspor memakai nama kolom file sumber dengan isi aslinya: kolom Rupiah berisi label
+    # rentang ("Rp2.000.001 - Rp4.000.000"), bukan nilai tengah hasil estimasi
+    labels = set(RUPIAH_LABEL_COLUMNS.values())
+    return {col: RUPIAH_LABEL_COLUMNS.get(col, col) for col in df.columns if col not in labels}
+
+
+def map_unique(series, func):
+    # Kolom berkardinalitas rendah (label rentang Rupiah, nama provinsi): bersihkan tiap nilai
+    # unik sekali, lalu sebarkan ke semua baris lewat kode faktorisasi
+    codes, uniques = pd.factorize(series, use_na_sentinel=False)
+    cleaned = func(pd.Series(uniques, dtype=series.dtype))
+    return pd.Series(cleaned.to_numpy()[codes], index=series.index, name=series.name)
+
+
+def parse_rupiah_range(series):
+    # "Rp2.000.001 - Rp4.000.000" -> nilai tengah rentang; angka tunggal -> angka itu;
+    # label terbuka dipetakan ke batasnya ("< Rp2.000.000" -> 2.000.000, "> Rp15.000.000" ->
+    # 15.000.000) agar rentang terbawah/teratas tetap ikut dalam kuantil (estimasi berbasis rentang)
+    text = series.astype(str).str.replace(r"Rp|[.,]", "", regex=True).str.strip()
+    bounds = text.str.extract(r"^(\d+)\s*[-–]\s*(\d+)$").astype(float)
+    single = pd.to_numeric(text.str.extract(r"^[<>]?\s*(\d+)$")[0], errors="coerce")
+    return bounds.mean(axis=1, skipna=False).fillna(single)
+
+
+def rupiah_brackets(series):
+    # Tabel rentang: label asli + nilai wakilnya (sama dengan parse_rupiah_range), urut naik
+    labels = pd.Series(series.dropna().unique(), dtype=object)
+    table = pd.DataFrame({"label": labels, "value": parse_rupiah_range(labels)}).dropna()
+    return table.sort_values("value").reset_index(drop=True)
+
+
+def rupiah_lower_bound(label):
+    # Urutan rentang pendapatan: "< Rp2.000.000" < "Rp2.000.001 - Rp4.000.000" < ... < "> Rp15.000.000"
+    match = re.search(r"\d[\d.]*", str(label))
+    return int(match.group().replace(".", "")) if match else -1
+
+
+def parse_number_id(series):
+    # Format angka Indonesia: titik = pemisah ribuan, koma = desimal ("6.226,21" -> 6226.21);
+    # simbol lain (%, spasi) dibuang, "-" -> NaN
+    text = series.astype(str).str.replace(r"[^0-9,\-]", "", regex=True).str.replace(",", ".", regex=False)
+    return pd.to_numeric(text, errors="coerce").astype(float)
+
+
+def likert_numeric(series):
+    # Kolom item bertipe campuran (teks) dikonversi per nilai unik; item tanpa nilai kosong
+    # disimpan sebagai int8 (1/8 memori float64)
+    if series.dtype == object:
+        series = map_unique(series, lambda values: pd.to_numeric(values, errors="coerce"))
+    return pd.to_numeric(series, errors="coerce", downcast="integer")
+
+
+def parse_regional(df):
+    df = df.copy()
+    df.columns = df.columns.str.strip().str.lower()
+    df = df.rename(columns=REGIONAL_COLUMNS)
+    for col in REGIONAL_COLUMNS.values():
+        if col != "province" and col in df.columns:
+            df[col] = parse_number_id(df[col])
+    df = df.dropna(subset=["province"])
+    df["province"] = map_unique(df["province"], canonical_province)
+    return df
+
+
+def clean_regional(df):
+    # Hapus baris yang tidak punya data pinjaman (mis. provinsi pemekaran Papua, "-")
+    return parse_regional(df).dropna(subset=["loan_amount_billion"])
+
+
+# ==================== DEKLARASI DAG ====================
+def build_pipeline(paths=DATA_PATHS):
+    pipeline = Pipeline(PIPELINE_CACHE_DIR)
+    for name, path in paths.items():
+        pipeline.source(f"{name}_raw", path, read_file)
+
+    @pipeline.node("profile_clean", inputs=["profile_raw"])
+    def profile_clean(df):
+        df = df.copy()
+        # Label rentang asli disimpan (filter, ekspor) sebelum diubah menjadi nilai tengah
+        for col, label_col in RUPIAH_LABEL_COLUMNS.items():
+            df[label_col] = df[col]
+        for col in RUPIAH_COLUMNS:
+            df[col] = map_unique(df[col], parse_rupiah_range)
+        df["province"] = map_unique(df["province"], canonical_province)
+        df["age"] = REFERENCE_YEAR - df["birth_year"]
+        return df
+
+    # Label rentang per metrik: kartu kuantil menampilkan rentang, bukan nilai wakilnya
+    @pipeline.node("rupiah_brackets", inputs=["profile_raw"])
+    def brackets(df):
+        return {col: rupiah_brackets(df[col]) for col in RUPIAH_COLUMNS}
+
+    pipeline.node("regional", inputs=["regional_raw"])(clean_regional)
+
+    # File regional ditimpa tiap bulan: simpan dulu sebagai snapshot periodenya
+    # (sekali per versi file; isi yang sama tidak ditulis ulang). Hanya bila REGIONAL_PERIOD diset;
+    # periode yang sudah berisi data lain tidak pernah ditimpa dari jalur otomatis.
+    pipeline.parameter("regional_period", snapshot_period)
+
+    @pipeline.node("regional_snapshot", inputs=["regional", "regional_period"])
+    def regional_snapshot(df, period):
+        status = None if period is None else ingest_snapshot(df, period)
+        return {"period": period, "status": status}
+
+    @pipeline.node("literacy_named", inputs=["literacy_raw"])
+    def literacy_named(df):
+        df = df.copy()
+        df.columns = df.columns.str.strip().str.replace(r"\s+", " ", regex=True)
+        # Samakan label gender (F/Wanita/Female, M/Pria/Male) dan nama provinsi (Inggris)
+        df["Gender"] = df["Gender"].replace({"F": "Female", "Wanita": "Female", "M": "Male", "Pria": "Male"})
+        df["Province of Origin"] = map_unique(df["Province of Origin"], canonical_province)
+        return df
+
+    @pipeline.node("literacy_items", inputs=["literacy_named"])
+    def literacy_items(df):
+        return {
+            "literacy": match_items(df.columns, LITERACY_ITEMS),
+            "behavior": match_items(df.columns, BEHAVIOR_ITEMS),
+            "decision": match_items(df.columns, DECISION_ITEMS),
+            "combined": match_items(df.columns, BEHAVIOR_ITEMS + DECISION_ITEMS),
+            "reversed": match_items(df.columns, REVERSE_KEYED_ITEMS),
+        }
+
+    @pipeline.node("literacy_clean", inputs=["literacy_named", "literacy_items"])
+    def literacy_clean(df, items):
+        df = df.copy()
+        item_cols = list(dict.fromkeys(items["literacy"] + items["combined"]))
+        df[item_cols] = df[item_cols].apply(likert_numeric)
+        # Item negatif (mis. "I am impulsive") dibalik (1↔4) agar searah dengan item lain
+        df = reverse_code(df, items["reversed"])
+
+        if len(items["literacy"]) >= 10:
+            df["avg_literacy_score"] = df[items["literacy"]].mean(axis=1)
+        if len(items["combined"]) >= 10:
+            df["avg_behavior_score"] = df[items["combined"]].mean(axis=1)
+
+        # Skor literasi gabungan: rata-rata semua item numerik skala 1–4
+        score_cols = [
+            col for col in df.columns
+            if df[col].dtype != "object" and col not in LITERACY_NON_ITEMS
+        ]
+        if score_cols:
+            df["literacy_score"] = df[score_cols].mean(axis=1)
+        return df
+
+    # Target penduduk diambil sebelum baris tanpa data pinjaman dibuang: provinsi pemekaran
+    # Papua punya penduduk walau data pinjamannya "-"
+    @pipeline.node("regional_population", inputs=["regional_raw"])
+    def regional_population(df):
+        return parse_regional(df)[["province", "population_thousand"]]
+
+    # Bobot post-stratifikasi (provinsi × gender × tahun lahir) terhadap data penduduk regional,
+    # beserta laporan konvergensi raking (margin tercapai vs target)
+    @pipeline.node("profile_weighting", inputs=["profile_clean", "regional_population"])
+    def profile_weighting(df, df_population):
+        weights, report = survey_weights(df, df_population, "province", "gender", "birth_year")
+        return {**report, "weights": weights}
+
+    @pipeline.node("literacy_weighting", inputs=["literacy_clean", "regional_population"])
+    def literacy_weighting(df, df_population):
+        weights, report = survey_weights(df, df_population, "Province of Origin", "Gender", "Year of Birth")
+        return {**report, "weights": weights}
+
+    @pipeline.node("weighting_report", inputs=["profile_weighting", "literacy_weighting"])
+    def weighting_report(profile_report, literacy_report):
+        return {
+            name: {key: value for key, value in report.items() if key != "weights"}
+            for name, report in [("profile", profile_report), ("literacy", literacy_report)]
+        }
+
+    @pipeline.node("profile", inputs=["profile_clean", "profile_weighting"])
+    def profile(df, weighting):
+        return df.assign(survey_weight=weighting["weights"])
+
+    @pipeline.node("literacy", inputs=["literacy_clean", "literacy_weighting"])
+    def literacy(df, weighting):
+        return df.assign(survey_weight=weighting["weights"])
+
+    # Satu sketsa kuantil per sel provinsi × gender untuk tiap metrik
+    @pipeline.node("cell_sketches", inputs=["profile_clean"])
+    def cell_sketches(df):
+        return build_cell_sketches(df, ["province", "gender"], list(QUANTILE_METRICS))
+
+    # Bitmap per nilai kategori untuk filter sidebar (urutan baris = tabel profile)
+    @pipeline.node("profile_bitmaps", inputs=["profile_clean"])
+    def profile_bitmaps(df):
+        return build_bitmap_index(df, list(FILTER_DIMENSIONS), sort_keys={"income_bucket": rupiah_lower_bound})
+
+    # Momen item per konstruk; diagnostik subkelompok cukup mengiris hasilnya
+    @pipeline.node("item_moments", inputs=["literacy_clean", "literacy_items"])
+    def moments(df, items):
+        scales = {scale: items[scale] for scale in ("literacy", "behavior", "decision")}
+        return scale_moments(df, scales, ["Gender", "Province of Origin"])
+
+    return pipeline
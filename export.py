@@ -0,0 +1,99 @@
+import io
+
+import numpy as np
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+# ==================== EKSPOR BERTAHAP (STREAMING) ====================
+# Baris dipilih lewat array posisi; hanya satu potongan (chunk) yang dimaterialisasi sekaligus.
+CHUNK_ROWS = 50_000
+
+EXPORT_FORMATS = {
+    "CSV": ("text/csv", "csv"),
+    "Parquet": ("application/vnd.apache.parquet", "parquet"),
+    "Arrow": ("application/vnd.apache.arrow.stream", "arrow"),
+}
+
+
+def select_columns(df, columns=None):
+    # columns: {nama kolom ekspor: kolom sumber}; None = semua kolom apa adanya
+    if columns is None:
+        return df
+    return df[list(columns.values())].set_axis(list(columns), axis=1)
+
+
+def iter_row_chunks(df, positions=None, chunk_rows=CHUNK_ROWS, columns=None):
+    positions = np.arange(len(df)) if positions is None else np.asarray(positions)
+    for start in range(0, len(positions), chunk_rows):
+        yield select_columns(df.take(positions[start:start + chunk_rows]), columns)
+
+
+class _DrainBuffer(io.RawIOBase):
+    # Sink tulis-saja untuk writer pyarrow; isinya diambil & dikosongkan tiap potongan
+    def __init__(self):
+        self._parts = []
+
+    def writable(self):
+        return True
+
+    def write(self, data):
+        self._parts.append(bytes(data))
+        return len(data)
+
+    def drain(self):
+        data, self._parts = b"".join(self._parts), []
+        return data
+
+
+def iter_csv(df, positions=None, chunk_rows=CHUNK_ROWS, columns=None):
+    header = True
+    for chunk in iter_row_chunks(df, positions, chunk_rows, columns):
+        yield chunk.to_csv(index=False, header=header, sep=";").encode("utf-8")
+        header = False
+    if header:
+        yield select_columns(df.iloc[:0], columns).to_csv(index=False, sep=";").encode("utf-8")
+
+
+def _iter_arrow_writer(df, positions, chunk_rows, columns, open_writer, write):
+    sink = _DrainBuffer()
+    writer = schema = None
+    for chunk in iter_row_chunks(df, positions, chunk_rows, columns):
+        if writer is None:
+            # Skema diambil dari potongan pertama lalu dikunci untuk potongan berikutnya
+            schema = pa.Schema.from_pandas(chunk, preserve_index=False)
+            writer = open_writer(sink, schema)
+        write(writer, pa.Table.from_pandas(chunk, schema=schema, preserve_index=False))
+        data = sink.drain()
+        if data:
+            yield data
+    if writer is None:
+        writer = open_writer(sink, pa.Schema.from_pandas(select_columns(df.iloc[:0], columns), preserve_index=False))
+    writer.close()
+    yield sink.drain()
+
+
+def iter_parquet(df, positions=None, chunk_rows=CHUNK_ROWS, columns=None):
+    # Satu row group per potongan
+    return _iter_arrow_writer(
+        df, positions, chunk_rows, columns,
+        lambda sink, schema: pq.ParquetWriter(sink, schema),
+        lambda writer, table: writer.write_table(table, row_group_size=chunk_rows),
+    )
+
+
+def iter_arrow(df, positions=None, chunk_rows=CHUNK_ROWS, columns=None):
+    return _iter_arrow_writer(
+        df, positions, chunk_rows, columns,
+        lambda sink, schema: pa.ipc.new_stream(sink, schema),
+        lambda writer, table: writer.write_table(table),
+    )
+
+
+EXPORTERS = {"CSV": iter_csv, "Parquet": iter_parquet, "Arrow": iter_arrow}
+
+
+def export_bytes(df, fmt, positions=None, chunk_rows=CHUNK_ROWS, columns=None):
+    # st.download_button (1.38) selalu membaca seluruh isi file ke memori, jadi file sementara tidak
+    # menghemat apa pun: hasil akhir dikembalikan sebagai bytes. Yang tetap dibatasi adalah salinan
+    # antara -- baris terfilter tidak pernah dimaterialisasi utuh sebagai DataFrame, hanya per potongan.
+    return b"".join(EXPORTERS[fmt](df, positions, chunk_rows, columns))
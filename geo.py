@@ -0,0 +1,282 @@
+import argparse
+import hashlib
+import json
+import os
+import urllib.request
+
+import numpy as np
+import pandas as pd
+import plotly.graph_objects as go
+
+from payload import CompactFigure, encode_typed_array
+from provinces import CANONICAL_PROVINCES, canonical_province
+
+# ==================== GEOMETRI PROVINSI ====================
+# GeoJSON lokal batas provinsi (FeatureCollection, Polygon/MultiPolygon, koordinat lon/lat).
+# Tidak ikut di repo: unduh sekali dengan `python geo.py fetch`, atau arahkan PROVINCE_GEOJSON ke file sendiri.
+APP_DIR = os.path.dirname(os.path.abspath(__file__))
+GEOJSON_PATH = os.environ.get("PROVINCE_GEOJSON", os.path.join(APP_DIR, "geo", "indonesia_provinces.geojson"))
+# Atribusi sumber (wajib untuk CC BY 4.0) ditulis di samping file GeoJSON saat fetch
+ATTRIBUTION_SUFFIX = ".ATTRIBUTION.txt"
+NAME_PROPERTIES = ["province", "Propinsi", "PROVINSI", "provinsi", "NAME_1", "shapeName", "name", "state"]
+
+# Batas ADM1 geoBoundaries (gbOpen, lisensi CC BY 4.0); API mengembalikan metadata berisi URL GeoJSON
+GEOBOUNDARIES_API = "https://www.geoboundaries.org/api/current/gbOpen/IDN/ADM1/"
+
+# Geometri tiap level disajikan sebagai file statis Streamlit (server.enableStaticServing):
+# trace cukup membawa URL-nya, browser mengunduh & meng-cache geometri sekali (ETag)
+GEO_STATIC_DIR = os.path.join(APP_DIR, "static", "geo")
+GEO_STATIC_URL = "app/static/geo"
+
+# Toleransi Douglas-Peucker (derajat), dari paling detail ke paling kasar
+SIMPLIFY_TOLERANCES = (0.002, 0.01, 0.03, 0.08)
+
+# Bentang bujur Indonesia ±95°–141° BT
+INDONESIA_LON_SPAN = 46.0
+
+
+# ==================== DOUGLAS-PEUCKER ====================
+def douglas_peucker(points, tolerance):
+    points = np.asarray(points, dtype=float)
+    if len(points) < 3:
+        return points
+    keep = np.zeros(len(points), dtype=bool)
+    keep[[0, -1]] = True
+    stack = [(0, len(points) - 1)]
+    while stack:
+        start, end = stack.pop()
+        if end - start < 2:
+            continue
+        segment = points[end] - points[start]
+        offsets = points[start + 1:end] - points[start]
+        length = np.hypot(*segment)
+        if length == 0:
+            distances = np.hypot(offsets[:, 0], offsets[:, 1])
+        else:
+            distances = np.abs(segment[0] * offsets[:, 1] - segment[1] * offsets[:, 0]) / length
+        split = int(np.argmax(distances))
+        if distances[split] > tolerance:
+            split += start + 1
+            keep[split] = True
+            stack.append((start, split))
+            stack.append((split, end))
+    return points[keep]
+
+
+def simplify_polygon(rings, tolerance):
+    simplified = []
+    for ring in rings:
+        reduced = douglas_peucker(ring, tolerance)
+        # Cincin yang menyusut di bawah 4 titik (pulau kecil) dibuang
+        if len(reduced) >= 4:
+            simplified.append(np.round(reduced, 5).tolist())
+    return simplified
+
+
+def simplify_geometry(geometry, tolerance):
+    if geometry["type"] == "Polygon":
+        polygons = [geometry["coordinates"]]
+    elif geometry["type"] == "MultiPolygon":
+        polygons = geometry["coordinates"]
+    else:
+        return geometry
+
+    simplified = [p for p in (simplify_polygon(poly, tolerance) for poly in polygons) if p]
+    if not simplified:
+        # Provinsi tetap harus tampil walau sangat kecil: pertahankan poligon terbesar
+        largest = max(polygons, key=lambda poly: len(poly[0]))
+        simplified = [[np.round(np.asarray(ring, dtype=float), 5).tolist() for ring in largest]]
+    return {"type": "MultiPolygon", "coordinates": simplified}
+
+
+def geometry_bbox(geometry):
+    polygons = [geometry["coordinates"]] if geometry["type"] == "Polygon" else geometry["coordinates"]
+    points = np.concatenate([np.asarray(ring, dtype=float)[:, :2] for poly in polygons for ring in poly])
+    return [*points.min(axis=0).tolist(), *points.max(axis=0).tolist()]
+
+
+# ==================== MUAT & SIAPKAN LEVEL DETAIL ====================
+def load_province_geojson(path=GEOJSON_PATH):
+    if not os.path.exists(path):
+        return None
+    with open(path, encoding="utf-8") as f:
+        geojson = json.load(f)
+
+    features = []
+    for feature in geojson.get("features", []):
+        props = feature.get("properties") or {}
+        name = next((props[key] for key in NAME_PROPERTIES if props.get(key)), None)
+        if name is None:
+            continue
+        features.append({
+            "type": "Feature",
+            "id": name,
+            "properties": {},
+            "bbox": geometry_bbox(feature["geometry"]),
+            "geometry": feature["geometry"],
+        })
+
+    # Kunci fitur = nama provinsi kanonik, sama dengan kolom "province" di dataset
+    names = canonical_province(pd.Series([f["id"] for f in features], dtype=object))
+    for feature, name in zip(features, names):
+        feature["id"] = name
+    return {"type": "FeatureCollection", "features": features}
+
+
+def build_simplified_levels(geojson, tolerances=SIMPLIFY_TOLERANCES):
+    levels = {}
+    for tolerance in tolerances:
+        levels[tolerance] = {
+            "type": "FeatureCollection",
+            "features": [
+                {**feature, "geometry": simplify_geometry(feature["geometry"], tolerance)}
+                for feature in geojson["features"]
+            ],
+        }
+    return levels
+
+
+def pick_tolerance(lon_span, width_px, tolerances=SIMPLIFY_TOLERANCES):
+    # Pilih level paling kasar yang galatnya masih di bawah ±1 piksel pada viewport
+    degrees_per_pixel = lon_span / max(width_px, 1)
+    fitting = [t for t in tolerances if t <= degrees_per_pixel]
+    return max(fitting) if fitting else min(tolerances)
+
+
+def geometry_lon_span(geojson, provinces=None):
+    # Memakai bbox yang sudah dihitung saat muat, bukan memindai ulang koordinat
+    boxes = [f["bbox"] for f in geojson["features"] if provinces is None or f["id"] in provinces]
+    if not boxes:
+        return INDONESIA_LON_SPAN
+    return max(box[2] for box in boxes) - min(box[0] for box in boxes)
+
+
+def tolerance_for_view(levels, provinces=None, width_px=1200):
+    finest = levels[min(levels)]
+    return pick_tolerance(geometry_lon_span(finest, provinces), width_px, tuple(levels))
+
+
+# ==================== GEOMETRI SEBAGAI FILE STATIS ====================
+def publish_level(geojson, static_dir=GEO_STATIC_DIR, url_prefix=GEO_STATIC_URL):
+    # Nama file = hash isi: aman ditulis bersamaan oleh beberapa worker dan tidak pernah basi
+    # di cache browser
+    body = json.dumps(geojson, separators=(",", ":")).encode("utf-8")
+    name = f"provinces-{hashlib.sha1(body).hexdigest()[:12]}.json"
+    path = os.path.join(static_dir, name)
+    if not os.path.exists(path):
+        os.makedirs(static_dir, exist_ok=True)
+        staging = f"{path}.{os.getpid()}.tmp"
+        with open(staging, "wb") as f:
+            f.write(body)
+        os.replace(staging, path)
+    return f"{url_prefix}/{name}"
+
+
+# ==================== CHOROPLETH ====================
+# Geometri adalah bagian terbesar peta dan sama untuk semua peta pada level detail yang sama:
+# figure dasar (geometri + gaya) diringkas sekali per level, tiap peta hanya mengganti
+# lokasi, nilai z, judul, dan teks hover di atas spesifikasi itu. Dengan geometry_url, trace
+# hanya memuat URL file statis, sehingga geometri tidak ikut terkirim di setiap rerun; tanpa
+# itu (static serving nonaktif) geometri tetap disisipkan utuh di tiap peta.
+def choropleth_base(geojson, colorscale="Blues", geometry_url=None):
+    fig = go.Figure(go.Choropleth(
+        geojson=geometry_url or geojson,
+        featureidkey="id",
+        colorscale=colorscale,
+        marker_line_color="white",
+        marker_line_width=0.5,
+    ))
+    fig.update_geos(fitbounds="locations", visible=False)
+    fig.update_layout(
+        margin=dict(t=60, b=0, l=0, r=0),
+        title_font_color="#1e3c72"
+    )
+    return CompactFigure(fig)
+
+
+def province_choropleth(base, provinces, values, title, hover_label, value_format=",.0f", height=550):
+    spec = base.to_dict()
+    trace = {
+        **spec["data"][0],
+        "locations": list(provinces),
+        "z": encode_typed_array(np.asarray(values, dtype=float)),
+        "colorbar": {"title": {"text": hover_label}},
+        "hovertemplate": f"<b>%{{location}}</b><br>{hover_label}: %{{z:{value_format}}}<extra></extra>",
+    }
+    layout = {
+        **spec["layout"],
+        "title": {**spec["layout"].get("title", {}), "text": title},
+        "height": height,
+    }
+    return CompactFigure.from_spec({"data": [trace], "layout": layout})
+
+
+# ==================== UNDUH BATAS PROVINSI ====================
+def _fetch_json(url):
+    with urllib.request.urlopen(url, timeout=60) as response:
+        return json.load(response)
+
+
+def attribution_text(metadata):
+    return (
+        f"{metadata.get('boundaryName', 'Indonesia')} {metadata.get('boundaryType', 'ADM1')} "
+        f"({metadata.get('boundaryYearRepresented', '-')})\n"
+        f"Sumber: {metadata.get('boundarySource', '-')} via geoBoundaries (www.geoboundaries.org)\n"
+        f"Lisensi: {metadata.get('boundaryLicense', 'CC BY 4.0')}\n"
+        f"Diunduh dari: {metadata.get('simplifiedGeometryGeoJSON', '-')}\n"
+        "Runfola, D. et al. (2020) geoBoundaries: A global database of political administrative "
+        "boundaries. PLoS ONE 15(4): e0231866.\n"
+    )
+
+
+def fetch_boundaries(path=GEOJSON_PATH, api=GEOBOUNDARIES_API):
+    metadata = _fetch_json(api)
+    geojson = _fetch_json(metadata["simplifiedGeometryGeoJSON"])
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    staging = f"{path}.{os.getpid()}.tmp"
+    with open(staging, "w", encoding="utf-8") as f:
+        json.dump(geojson, f)
+    os.replace(staging, path)
+    with open(path + ATTRIBUTION_SUFFIX, "w", encoding="utf-8") as f:
+        f.write(attribution_text(metadata))
+    return metadata
+
+
+def check_boundaries(path=GEOJSON_PATH):
+    # Nama fitur yang tidak cocok dengan nama kanonik tidak akan pernah terwarnai di peta
+    geojson = load_province_geojson(path)
+    if geojson is None:
+        return None
+    names = {feature["id"] for feature in geojson["features"]}
+    return {
+        "features": len(geojson["features"]),
+        "unmatched": sorted(names - set(CANONICAL_PROVINCES)),
+        "missing": [name for name in CANONICAL_PROVINCES if name not in names],
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Siapkan file GeoJSON batas provinsi untuk peta choropleth.")
+    parser.add_argument("--path", default=GEOJSON_PATH)
+    commands = parser.add_subparsers(dest="command", required=True)
+    fetch = commands.add_parser("fetch", help="unduh batas ADM1 Indonesia dari geoBoundaries (CC BY 4.0)")
+    fetch.add_argument("--api", default=GEOBOUNDARIES_API)
+    commands.add_parser("check", help="cocokkan nama fitur dengan nama provinsi kanonik")
+    args = parser.parse_args(argv)
+
+    if args.command == "fetch":
+        metadata = fetch_boundaries(args.path, args.api)
+        print(f"Disimpan ke {args.path} ({metadata.get('boundarySource', 'geoBoundaries')}, "
+              f"lisensi {metadata.get('boundaryLicense', 'CC BY 4.0')}); "
+              f"atribusi di {args.path + ATTRIBUTION_SUFFIX} -- sertakan keduanya saat commit")
+
+    report = check_boundaries(args.path)
+    if report is None:
+        parser.exit(1, f"File {args.path} tidak ditemukan\n")
+    print(f"{report['features']} fitur")
+    print("Tidak dikenali: " + (", ".join(report["unmatched"]) or "-"))
+    print("Tidak ada di file: " + (", ".join(report["missing"]) or "-"))
+
+
+if __name__ == "__main__":
+    main()
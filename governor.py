@@ -0,0 +1,290 @@
+import functools
+import hmac
+import os
+import sys
+import threading
+import time
+
+import numpy as np
+import pandas as pd
+import plotly.graph_objects as go
+import plotly.io as pio
+import streamlit as st
+from streamlit.runtime.scriptrunner import get_script_run_ctx
+
+# ==================== ANGGARAN MEMORI CACHE ====================
+# Satu anggaran byte per proses untuk semua cache (data, agregat, grafik); bisa diubah lewat
+# environment variable. Melewati anggaran -> entri dengan prioritas terendah dibuang.
+CACHE_BUDGET_BYTES = int(float(os.environ.get("CACHE_BUDGET_MB", 256)) * 1024 ** 2)
+CACHE_KINDS = {
+    "data": "Data",
+    "aggregate": "Agregat",
+    "figure": "Grafik",
+}
+# Sesi yang tidak rerun lagi selama ini dianggap sudah ditutup
+SESSION_TTL_SECONDS = int(os.environ.get("SESSION_TTL_SECONDS", 900))
+# Halaman admin hanya aktif bila rahasia ini diset (tidak kosong)
+ADMIN_TOKEN = os.environ.get("ADMIN_TOKEN", "")
+
+
+# ==================== ESTIMASI UKURAN ====================
+def estimate_bytes(obj, _seen=None):
+    # Perkiraan byte yang ditahan objek: memory_usage(deep=True) untuk pandas, nbytes untuk
+    # larik numpy/Arrow, ukuran JSON untuk grafik, selebihnya ditelusuri isinya
+    seen = set() if _seen is None else _seen
+    if obj is None or id(obj) in seen:
+        return 0
+    seen.add(id(obj))
+
+    if isinstance(obj, pd.DataFrame):
+        return int(obj.memory_usage(deep=True).sum())
+    if isinstance(obj, (pd.Series, pd.Index)):
+        return int(obj.memory_usage(deep=True))
+    if isinstance(getattr(obj, "nbytes", None), (int, np.integer)):
+        return int(obj.nbytes)
+    if isinstance(obj, go.Figure):
+        return len(pio.to_json(obj.to_dict(), validate=False))
+    if isinstance(obj, dict):
+        return sys.getsizeof(obj) + sum(
+            estimate_bytes(key, seen) + estimate_bytes(value, seen) for key, value in obj.items()
+        )
+    if isinstance(obj, (list, tuple, set, frozenset)):
+        return sys.getsizeof(obj) + sum(estimate_bytes(item, seen) for item in obj)
+    if hasattr(obj, "__dict__"):
+        return sys.getsizeof(obj) + estimate_bytes(vars(obj), seen)
+    return sys.getsizeof(obj)
+
+
+def current_session_id():
+    ctx = get_script_run_ctx()
+    return ctx.session_id if ctx is not None else "-"
+
+
+def process_rss_bytes():
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError):
+        return None
+
+
+# ==================== CACHE BERANGGARAN (GREEDYDUAL-SIZE) ====================
+# Prioritas entri = L + biaya hitung ulang (detik) / byte. L naik ke prioritas entri yang terakhir
+# dibuang, sehingga entri yang lama tidak dipakai tertinggal di bawah entri yang baru disentuh
+# (perilaku LRU), sementara entri kecil yang mahal dihitung bertahan lebih lama daripada entri
+# besar yang murah dihitung ulang.
+#
+# Entri "pinned" (tabel data plane yang dipetakan dari memori bersama) tidak dihitung ke anggaran
+# dan tidak pernah dibuang: halamannya milik /dev/shm, bukan memori privat proses, sehingga
+# membuangnya tidak membebaskan apa pun. Entri ini dilepas eksplisit lewat release() saat versinya
+# tidak lagi dipakai.
+class MemoryGovernor:
+    def __init__(self, budget_bytes=CACHE_BUDGET_BYTES):
+        self.budget_bytes = budget_bytes
+        self.sessions = {}
+        self._entries = {}
+        self._key_locks = {}
+        self._lock = threading.Lock()
+        self.clear()
+
+    def _touch(self, entry):
+        entry["last_used"] = time.time()
+        entry["priority"] = self._clock + entry["cost"] / max(entry["bytes"], 1)
+
+    def _evict(self):
+        used = self.used_bytes
+        candidates = [k for k, entry in self._entries.items() if not entry["pinned"]]
+        while used > self.budget_bytes and candidates:
+            victim = min(candidates, key=lambda k: self._entries[k]["priority"])
+            candidates.remove(victim)
+            entry = self._entries.pop(victim)
+            self._clock = max(self._clock, entry["priority"])
+            stats = self._stats[victim[0]]
+            stats["evictions"] += 1
+            stats["evicted_bytes"] += entry["bytes"]
+            used -= entry["bytes"]
+
+    def get_or_compute(self, kind, key, compute, pinned=False):
+        cache_key = (kind, key)
+        with self._lock:
+            entry = self._entries.get(cache_key)
+            if entry is not None:
+                self._touch(entry)
+                entry["hits"] += 1
+                self._stats[kind]["hits"] += 1
+                return entry["value"]
+            key_lock = self._key_locks.setdefault(cache_key, threading.Lock())
+
+        # Satu sesi menghitung, sesi lain dengan kunci yang sama menunggu hasilnya
+        with key_lock:
+            with self._lock:
+                entry = self._entries.get(cache_key)
+                if entry is not None:
+                    self._touch(entry)
+                    entry["hits"] += 1
+                    self._stats[kind]["hits"] += 1
+                    return entry["value"]
+                self._stats[kind]["misses"] += 1
+
+            start = time.perf_counter()
+            value = compute()
+            cost = time.perf_counter() - start
+            entry = {"value": value, "bytes": estimate_bytes(value), "cost": cost, "hits": 0, "pinned": pinned}
+            with self._lock:
+                self._touch(entry)
+                entry["created"] = entry["last_used"]
+                self._entries[cache_key] = entry
+                self._key_locks.pop(cache_key, None)
+                self._evict()
+        return value
+
+    def cached(self, kind, pinned=False):
+        # Pengganti st.cache_resource: argumen fungsi (harus hashable) menjadi kunci cache
+        def decorate(func):
+            @functools.wraps(func)
+            def wrapper(*args):
+                return self.get_or_compute(kind, (func.__qualname__, *args), lambda: func(*args), pinned)
+            return wrapper
+        return decorate
+
+    def release(self, predicate):
+        # Lepas entri yang kuncinya memenuhi predicate (mis. milik versi data lama); bukan eviksi
+        with self._lock:
+            for cache_key in [k for k in self._entries if predicate(k[1])]:
+                del self._entries[cache_key]
+
+    def clear(self):
+        # Semua entri & statistik dikosongkan; catatan sesi tetap
+        with self._lock:
+            self._entries.clear()
+            self._clock = 0.0
+            self._stats = {kind: {"hits": 0, "misses": 0, "evictions": 0, "evicted_bytes": 0} for kind in CACHE_KINDS}
+
+    @property
+    def used_bytes(self):
+        return sum(entry["bytes"] for entry in self._entries.values() if not entry["pinned"])
+
+    @property
+    def pinned_bytes(self):
+        return sum(entry["bytes"] for entry in self._entries.values() if entry["pinned"])
+
+    # ==================== AKUNTANSI PER SESI ====================
+    def record_session(self, session_id, parts):
+        # parts: {nama: byte} yang ditahan sesi pada rerun terakhir
+        now = time.time()
+        with self._lock:
+            record = self.sessions.setdefault(session_id, {"reruns": 0, "peak_bytes": 0})
+            record["parts"] = dict(parts)
+            record["bytes"] = sum(parts.values())
+            record["peak_bytes"] = max(record["peak_bytes"], record["bytes"])
+            record["reruns"] += 1
+            record["last_seen"] = now
+            for expired in [sid for sid, r in self.sessions.items() if now - r["last_seen"] > SESSION_TTL_SECONDS]:
+                del self.sessions[expired]
+
+    # ==================== RINGKASAN ====================
+    def cache_table(self):
+        with self._lock:
+            rows = []
+            for kind, label in CACHE_KINDS.items():
+                entries = [e for (k, _), e in self._entries.items() if k == kind]
+                stats = self._stats[kind]
+                lookups = stats["hits"] + stats["misses"]
+                rows.append({
+                    "Cache": label,
+                    "Entri": len(entries),
+                    "Ukuran (MB)": sum(e["bytes"] for e in entries if not e["pinned"]) / 1024 ** 2,
+                    "Bersama/Dipin (MB)": sum(e["bytes"] for e in entries if e["pinned"]) / 1024 ** 2,
+                    "Hit Rate (%)": 100 * stats["hits"] / lookups if lookups else np.nan,
+                    "Eviksi": stats["evictions"],
+                    "Dibuang (MB)": stats["evicted_bytes"] / 1024 ** 2,
+                })
+        return pd.DataFrame(rows)
+
+    def entry_table(self, limit=50):
+        now = time.time()
+        with self._lock:
+            rows = [
+                {
+                    "Cache": CACHE_KINDS[kind],
+                    "Kunci": repr(key)[:80],
+                    "Ukuran (KB)": entry["bytes"] / 1024,
+                    "Biaya Hitung (ms)": entry["cost"] * 1000,
+                    "Hit": entry["hits"],
+                    "Dipin": entry["pinned"],
+                    "Terakhir Dipakai (dtk lalu)": now - entry["last_used"],
+                    # Prioritas dalam ms biaya hitung ulang per MB (ditambah L saat disentuh)
+                    "Prioritas (ms/MB)": entry["priority"] * 1000 * 1024 ** 2,
+                }
+                for (kind, key), entry in self._entries.items()
+            ]
+        table = pd.DataFrame(rows)
+        return table.sort_values("Ukuran (KB)", ascending=False).head(limit) if rows else table
+
+    def session_table(self):
+        now = time.time()
+        with self._lock:
+            rows = [
+                {
+                    "Sesi": session_id[:8],
+                    **{f"{name} (KB)": size / 1024 for name, size in record["parts"].items()},
+                    "Total (KB)": record["bytes"] / 1024,
+                    "Puncak (KB)": record["peak_bytes"] / 1024,
+                    "Rerun": record["reruns"],
+                    "Aktif (dtk lalu)": now - record["last_seen"],
+                }
+                for session_id, record in self.sessions.items()
+            ]
+        return pd.DataFrame(rows)
+
+    @property
+    def total_evictions(self):
+        return sum(stats["evictions"] for stats in self._stats.values())
+
+
+# Satu governor per proses, dipakai bersama semua sesi
+GOVERNOR = MemoryGovernor()
+
+
+# ==================== HALAMAN ADMIN ====================
+def admin_authorized(token):
+    # Perbandingan waktu-konstan agar token tidak bisa ditebak per karakter
+    if not ADMIN_TOKEN or not token:
+        return False
+    return hmac.compare_digest(str(token).encode(), ADMIN_TOKEN.encode())
+
+
+def render_admin_page(governor=GOVERNOR):
+    st.header("Memori & Cache")
+    used, budget = governor.used_bytes, governor.budget_bytes
+    rss = process_rss_bytes()
+    c1, c2, c3, c4 = st.columns(4)
+    c1.metric("Cache Terpakai", f"{used / 1024 ** 2:,.1f} MB", f"{100 * used / budget:.0f}% anggaran", delta_color="off")
+    c2.metric("Anggaran", f"{budget / 1024 ** 2:,.0f} MB")
+    c3.metric("Eviksi", f"{governor.total_evictions:,}")
+    c4.metric("RSS Proses", "-" if rss is None else f"{rss / 1024 ** 2:,.0f} MB")
+    st.caption(
+        f"Data plane bersama (mmap, di luar anggaran): {governor.pinned_bytes / 1024 ** 2:,.1f} MB"
+    )
+    st.progress(min(used / budget, 1.0))
+
+    st.subheader("Per Cache")
+    st.dataframe(governor.cache_table().round(2), use_container_width=True, hide_index=True)
+
+    st.subheader("Per Sesi (Rerun Terakhir)")
+    sessions = governor.session_table()
+    if sessions.empty:
+        st.info("Belum ada sesi dashboard yang tercatat di proses ini.")
+    else:
+        st.dataframe(sessions.round(1), use_container_width=True, hide_index=True)
+        st.caption(
+            "Data terfilter dengan kombinasi filter yang sama dipakai bersama lewat cache agregat; "
+            f"sesi yang tidak aktif selama {SESSION_TTL_SECONDS // 60} menit dihapus dari daftar."
+        )
+
+    st.subheader("Entri Terbesar")
+    st.dataframe(governor.entry_table().round(2), use_container_width=True, hide_index=True)
+
+    if st.button("Kosongkan Semua Cache"):
+        governor.clear()
+        st.rerun()
@@ -0,0 +1,302 @@
+import argparse
+import json
+import os
+import random
+import resource
+import shutil
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+
+import numpy as np
+import pandas as pd
+
+APP_DIR = os.path.dirname(os.path.abspath(__file__))
+APP_PATH = os.path.join(APP_DIR, "app.py")
+DATA_FILES = {
+    "profile": "GenZ_Financial_Profile.csv",
+    "literacy": "GenZ_Financial_Literacy_Survey.csv",
+    "regional": "Regional_Economic_Indicators.csv",
+}
+
+# Bobot relatif tiap aksi pengguna dalam satu sesi
+ACTION_WEIGHTS = {
+    "province": 0.35,
+    "gender": 0.20,
+    "reset": 0.10,
+    "weights": 0.10,
+    "quantile_metric": 0.10,
+    "subgroup": 0.10,
+    "province_view": 0.05,
+    "advanced_filter": 0.10,
+}
+
+
+# ==================== DATA SINTETIS ====================
+def read_raw(path):
+    try:
+        return pd.read_csv(path, delimiter=";", encoding="utf-8")
+    except UnicodeDecodeError:
+        return pd.read_csv(path, delimiter=";", encoding="ISO-8859-1")
+
+
+def write_synthetic_data(dest, scale, seed=0):
+    # Sampel ulang baris survei (dengan pengembalian) sebanyak scale × ukuran asli;
+    # data regional tetap 38 provinsi
+    rng = np.random.default_rng(seed)
+    for key, name in DATA_FILES.items():
+        df = read_raw(os.path.join(APP_DIR, name))
+        if key != "regional":
+            df = df.iloc[rng.integers(0, len(df), len(df) * scale)].reset_index(drop=True)
+            if key == "profile":
+                df["user_id ID"] = [f"S{i:08d}" for i in range(len(df))]
+        df.to_csv(os.path.join(dest, name), sep=";", index=False, encoding="utf-8")
+
+
+# ==================== STATE TERISOLASI ====================
+# Direktori state aplikasi (data plane, cache pipeline, snapshot regional) dibaca dari
+# environment saat modulnya diimpor. Uji beban memakai direktori sementara sendiri agar tidak
+# memindahkan CURRENT / memangkas versi data plane produksi di /dev/shm.
+STATE_ENV = {
+    "DATA_PLANE_DIR": "dataplane",
+    "PIPELINE_CACHE_DIR": "pipeline",
+    "REGIONAL_SNAPSHOT_DIR": "snapshots",
+}
+STATE_MODULES = ("dataplane", "datasets", "pipeline", "snapshots")
+
+
+def isolate_state():
+    imported = [name for name in STATE_MODULES if name in sys.modules]
+    if imported:
+        raise RuntimeError(f"Modul {', '.join(imported)} sudah diimpor; direktori state tidak bisa diisolasi")
+    state_dir = tempfile.mkdtemp(prefix="genz-loadtest-")
+    previous = {key: os.environ.get(key) for key in STATE_ENV}
+    for key, sub in STATE_ENV.items():
+        os.environ[key] = os.path.join(state_dir, sub)
+    return state_dir, previous
+
+
+def restore_state(state_dir, previous):
+    for key, value in previous.items():
+        if value is None:
+            os.environ.pop(key, None)
+        else:
+            os.environ[key] = value
+    shutil.rmtree(state_dir, ignore_errors=True)
+
+
+# ==================== SESI PENGGUNA ====================
+def install_shared_runtime():
+    # AppTest mengganti Runtime._instance dengan mock di awal tiap run dan mengosongkannya
+    # di akhir; dengan banyak sesi bersamaan, thread skrip lain bisa kehilangan runtime.
+    # Fallback ke mock terakhir agar sesi paralel berjalan seperti di satu server.
+    from streamlit import runtime
+    from streamlit.runtime import Runtime
+
+    if getattr(runtime.get_instance, "_shared", False):
+        return
+    last = {}
+
+    def get_instance():
+        instance = Runtime._instance
+        if instance is not None:
+            last["runtime"] = instance
+            return instance
+        if "runtime" in last:
+            return last["runtime"]
+        return Runtime.instance()
+
+    get_instance._shared = True
+    runtime.get_instance = get_instance
+
+
+def _widget(widgets, label):
+    return next((w for w in widgets if w.label == label), None)
+
+
+def apply_action(at, action, rng):
+    if action in ("province", "gender", "reset"):
+        targets = ["Pilih Provinsi", "Pilih Jenis Kelamin"] if action == "reset" else \
+            ["Pilih Provinsi" if action == "province" else "Pilih Jenis Kelamin"]
+        for label in targets:
+            box = _widget(at.selectbox, label)
+            if box is not None:
+                box.select_index(0 if action == "reset" else rng.randrange(len(box.options)))
+    elif action == "weights":
+        box = _widget(at.checkbox, "Terapkan bobot survei")
+        if box is not None:
+            box.set_value(not box.value)
+    elif action == "quantile_metric":
+        box = _widget(at.selectbox, "Pilih Metrik")
+        if box is not None:
+            box.select_index(rng.randrange(len(box.options)))
+    elif action == "subgroup":
+        box = _widget(at.selectbox, "Subkelompok Responden")
+        if box is not None:
+            box.select_index(rng.randrange(len(box.options)))
+    elif action == "advanced_filter":
+        # Satu dimensi filter lanjutan diisi subset acak (kosong = semua)
+        if at.multiselect:
+            box = rng.choice(list(at.multiselect))
+            box.set_value(rng.sample(list(box.options), rng.randint(0, min(3, len(box.options)))))
+    elif action == "province_view":
+        radio = _widget(at.radio, "Tampilan Provinsi")
+        if radio is not None:
+            radio.set_value(rng.choice(list(radio.options)))
+
+
+def run_session(session_id, n_actions, seed, timeout):
+    from streamlit.testing.v1 import AppTest
+
+    rng = random.Random(seed * 1000 + session_id)
+    actions = list(ACTION_WEIGHTS)
+    latencies, errors = [], 0
+
+    at = AppTest.from_file(APP_PATH, default_timeout=timeout)
+    for step in range(n_actions + 1):
+        if step:
+            apply_action(at, rng.choices(actions, weights=ACTION_WEIGHTS.values())[0], rng)
+        start = time.perf_counter()
+        at.run()
+        latencies.append(time.perf_counter() - start)
+        errors += len(at.exception)
+    return latencies, errors
+
+
+# ==================== PENGUKURAN ====================
+def current_rss_mb():
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 1024 ** 2
+    except (OSError, ValueError):
+        return float("nan")
+
+
+def peak_rss_mb():
+    # ru_maxrss dalam KB di Linux, byte di macOS
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / 1024 ** 2 if sys.platform == "darwin" else peak / 1024
+
+
+def run_scenario(n_sessions, n_actions, seed, timeout):
+    import streamlit as st
+    from governor import GOVERNOR
+
+    install_shared_runtime()
+
+    # Mulai dari cache kosong agar tiap skenario sebanding
+    st.cache_data.clear()
+    st.cache_resource.clear()
+    GOVERNOR.clear()
+
+    cpu_start, wall_start = time.process_time(), time.perf_counter()
+    with ThreadPoolExecutor(max_workers=n_sessions) as pool:
+        results = list(pool.map(
+            lambda i: run_session(i, n_actions, seed, timeout), range(n_sessions)
+        ))
+    wall = time.perf_counter() - wall_start
+    cpu = time.process_time() - cpu_start
+
+    latencies = np.concatenate([np.asarray(r[0]) for r in results]) * 1000
+    return {
+        "sessions": n_sessions,
+        "reruns": int(len(latencies)),
+        "errors": int(sum(r[1] for r in results)),
+        "p50_ms": float(np.percentile(latencies, 50)),
+        "p95_ms": float(np.percentile(latencies, 95)),
+        "p99_ms": float(np.percentile(latencies, 99)),
+        "mean_ms": float(latencies.mean()),
+        "throughput_rps": float(len(latencies) / wall),
+        "wall_seconds": float(wall),
+        "cpu_seconds": float(cpu),
+        "cpu_percent": float(100 * cpu / wall),
+        "rss_mb": float(current_rss_mb()),
+        "peak_rss_mb": float(peak_rss_mb()),
+        "cache_mb": GOVERNOR.used_bytes / 1024 ** 2,
+        "cache_evictions": GOVERNOR.total_evictions,
+        "threads": threading.active_count(),
+    }
+
+
+def git_version():
+    try:
+        return subprocess.run(
+            ["git", "describe", "--always", "--dirty"],
+            cwd=APP_DIR, capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def run_load_test(session_counts, scales, n_actions, seed, timeout):
+    runs = []
+    original_cwd = os.getcwd()
+    # Harus sebelum AppTest pertama kali mengimpor modul aplikasi
+    state_dir, previous_env = isolate_state()
+    try:
+        for scale in scales:
+            # app.py membaca CSV relatif terhadap direktori kerja
+            with tempfile.TemporaryDirectory() as data_dir:
+                if scale == 1:
+                    os.chdir(APP_DIR)
+                    dataset = "bundled"
+                else:
+                    write_synthetic_data(data_dir, scale, seed)
+                    os.chdir(data_dir)
+                    dataset = f"synthetic-x{scale}"
+
+                for n_sessions in session_counts:
+                    result = run_scenario(n_sessions, n_actions, seed, timeout)
+                    result["dataset"] = dataset
+                    runs.append(result)
+                    print(
+                        f"[{dataset}] {n_sessions:>3} sesi: p50 {result['p50_ms']:.0f} ms, "
+                        f"p95 {result['p95_ms']:.0f} ms, p99 {result['p99_ms']:.0f} ms, "
+                        f"{result['throughput_rps']:.2f} rerun/s, CPU {result['cpu_percent']:.0f}%, "
+                        f"RSS {result['rss_mb']:.0f} MB, cache {result['cache_mb']:.1f} MB "
+                        f"({result['cache_evictions']} eviksi)"
+                    )
+                os.chdir(original_cwd)
+    finally:
+        os.chdir(original_cwd)
+        restore_state(state_dir, previous_env)
+
+    return {
+        "version": git_version(),
+        "timestamp": datetime.now(timezone.utc).isoformat(),
+        "python": sys.version.split()[0],
+        "cpu_count": os.cpu_count(),
+        "actions_per_session": n_actions,
+        "seed": seed,
+        "runs": runs,
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Uji beban dashboard app.py dengan Streamlit AppTest.")
+    parser.add_argument("--sessions", type=int, nargs="+", default=[1, 2, 4, 8],
+                        help="jumlah sesi bersamaan yang diuji")
+    parser.add_argument("--scales", type=int, nargs="+", default=[1],
+                        help="1 = CSV bawaan; >1 = data sintetis sebesar N × data bawaan")
+    parser.add_argument("--actions", type=int, default=10, help="jumlah aksi per sesi")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--timeout", type=float, default=300, help="batas waktu satu rerun (detik)")
+    parser.add_argument("--output", default="loadtest_results.json")
+    args = parser.parse_args(argv)
+
+    if APP_DIR not in sys.path:
+        # Sama seperti `streamlit run`: modul pendamping app.py bisa diimpor
+        sys.path.insert(0, APP_DIR)
+
+    report = run_load_test(args.sessions, args.scales, args.actions, args.seed, args.timeout)
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+    print(f"Hasil disimpan ke {args.output}")
+
+
+if __name__ == "__main__":
+    main()
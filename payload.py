@@ -0,0 +1,135 @@
+import base64
+import os
+
+import numpy as np
+import pandas as pd
+import plotly.graph_objects as go
+import plotly.io as pio
+import streamlit as st
+
+# ==================== ANGGARAN PAYLOAD ====================
+# Batas total byte JSON grafik per rerun; bisa diubah lewat environment variable
+FIGURE_BYTE_BUDGET = int(os.environ.get("FIGURE_BYTE_BUDGET", 1_500_000))
+
+DEFAULT_DECIMALS = 3
+MIN_TYPED_LENGTH = 8
+
+# Atribut larik data yang didukung plotly.js sebagai typed array ({dtype, bdata})
+TYPED_ARRAY_KEYS = {"x", "y", "z", "base", "width", "values", "lat", "lon", "r", "theta"}
+TYPED_ARRAY_MARKER_KEYS = {"color", "size"}
+
+# Bagian layout yang hanya relevan untuk jenis trace tertentu
+SUBPLOT_LAYOUT_KEYS = {
+    "geo": {"choropleth", "scattergeo"},
+    "mapbox": {"scattermapbox", "choroplethmapbox", "densitymapbox"},
+    "polar": {"scatterpolar", "scatterpolargl", "barpolar"},
+    "ternary": {"scatterternary"},
+    "scene": {"scatter3d", "surface", "mesh3d", "cone", "streamtube", "volume", "isosurface"},
+}
+
+
+# ==================== ENCODING ====================
+def encode_typed_array(values, decimals=DEFAULT_DECIMALS):
+    arr = np.asarray(values)
+    if arr.ndim != 1 or len(arr) < MIN_TYPED_LENGTH or arr.dtype.kind not in "biuf":
+        return values
+    arr = np.round(arr.astype(float), decimals)
+
+    if np.isfinite(arr).all() and (arr == np.round(arr)).all():
+        for dtype, info in (("i1", np.int8), ("i2", np.int16), ("i4", np.int32)):
+            limits = np.iinfo(info)
+            if arr.min() >= limits.min and arr.max() <= limits.max:
+                return {"dtype": dtype, "bdata": base64.b64encode(arr.astype("<" + dtype).tobytes()).decode()}
+
+    dtype = "f4" if np.nanmax(np.abs(arr), initial=0) < 1e8 else "f8"
+    return {"dtype": dtype, "bdata": base64.b64encode(arr.astype("<" + dtype).tobytes()).decode()}
+
+
+def _strip_template(layout, trace_types):
+    template = layout.get("template")
+    if not template:
+        return
+    template_data = template.get("data", {})
+    template["data"] = {t: v for t, v in template_data.items() if t in trace_types}
+    template_layout = template.get("layout", {})
+    for key, users in SUBPLOT_LAYOUT_KEYS.items():
+        if key in template_layout and not (users & trace_types):
+            del template_layout[key]
+
+
+def compact_figure_dict(fig, decimals=DEFAULT_DECIMALS):
+    spec = fig.to_dict()
+    data, layout = spec.get("data", []), spec.setdefault("layout", {})
+    trace_types = {trace.get("type", "scatter") for trace in data}
+
+    _strip_template(layout, trace_types)
+
+    for trace in data:
+        for key in TYPED_ARRAY_KEYS & trace.keys():
+            trace[key] = encode_typed_array(trace[key], decimals)
+        marker = trace.get("marker")
+        if isinstance(marker, dict):
+            for key in TYPED_ARRAY_MARKER_KEYS & marker.keys():
+                marker[key] = encode_typed_array(marker[key], decimals)
+    return spec
+
+
+class CompactFigure(go.Figure):
+    # st.plotly_chart memanggil to_dict() lalu to_json(validate=False);
+    # spesifikasi ringkas disiapkan sekali dan dikembalikan apa adanya
+    def __init__(self, fig, decimals=DEFAULT_DECIMALS):
+        super().__init__()
+        self._set_spec(compact_figure_dict(fig, decimals))
+
+    def _set_spec(self, spec):
+        self._compact_spec = spec
+        self._nbytes = len(pio.to_json(spec, validate=False))
+
+    @classmethod
+    def from_spec(cls, spec):
+        # Spesifikasi yang sudah ringkas (mis. turunan figure dasar yang di-cache) dipakai apa adanya
+        compact = cls.__new__(cls)
+        go.Figure.__init__(compact)
+        compact._set_spec(spec)
+        return compact
+
+    def to_dict(self):
+        return self._compact_spec
+
+    @property
+    def nbytes(self):
+        return self._nbytes
+
+
+# ==================== PENCATAT UKURAN PER HALAMAN ====================
+class PayloadMeter:
+    def __init__(self, budget_bytes=FIGURE_BYTE_BUDGET):
+        self.budget_bytes = budget_bytes
+        self.records = []
+
+    def plotly_chart(self, fig, name, decimals=DEFAULT_DECIMALS, container=st, **kwargs):
+        # Grafik dari cache sudah ringkas; tidak diringkas ulang
+        compact = fig if isinstance(fig, CompactFigure) else CompactFigure(fig, decimals)
+        self.records.append({"Grafik": name, "Byte": compact.nbytes})
+        kwargs.setdefault("use_container_width", True)
+        return container.plotly_chart(compact, **kwargs)
+
+    @property
+    def total_bytes(self):
+        return sum(r["Byte"] for r in self.records)
+
+    def report(self):
+        if not self.records:
+            return
+        if self.total_bytes > self.budget_bytes:
+            st.warning(
+                f"Ukuran grafik halaman ini {self.total_bytes / 1024:,.0f} KB "
+                f"melebihi anggaran {self.budget_bytes / 1024:,.0f} KB."
+            )
+        with st.expander("Ukuran Payload Grafik"):
+            table = pd.DataFrame(self.records)
+            st.dataframe(table, use_container_width=True, hide_index=True)
+            st.caption(
+                f"Total terkirim: {self.total_bytes / 1024:,.1f} KB "
+                f"dari anggaran {self.budget_bytes / 1024:,.0f} KB per rerun."
+            )
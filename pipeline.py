@@ -0,0 +1,227 @@
+import hashlib
+import inspect
+import os
+import pickle
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime
+
+import pandas as pd
+
+
+# ==================== PIPELINE DATA TURUNAN (DAG) ====================
+PROJECT_DIR = os.path.dirname(os.path.abspath(__file__))
+# Hasil tiap node disimpan ke disk per versi, agar proses (atau penerbitan) berikutnya hanya
+# menghitung node yang versinya berubah tanpa menahan semua tahap antara di memori
+PIPELINE_CACHE_DIR = os.environ.get("PIPELINE_CACHE_DIR", os.path.join(tempfile.gettempdir(), "genz-pipeline"))
+
+
+def _is_project_object(obj):
+    module = sys.modules.get(getattr(obj, "__module__", None) or "")
+    path = getattr(module, "__file__", None)
+    return path is not None and os.path.dirname(os.path.abspath(path)) == PROJECT_DIR
+
+
+def _referenced_names(code):
+    names = set(code.co_names)
+    for const in code.co_consts:
+        if inspect.iscode(const):
+            names |= _referenced_names(const)
+    return names
+
+
+def _stable_repr(value):
+    # repr set tergantung PYTHONHASHSEED; diurutkan agar versi sama di semua proses
+    if isinstance(value, (set, frozenset)):
+        return "{" + ", ".join(sorted(_stable_repr(v) for v in value)) + "}"
+    if isinstance(value, dict):
+        return "{" + ", ".join(f"{_stable_repr(k)}: {_stable_repr(v)}" for k, v in value.items()) + "}"
+    if isinstance(value, (list, tuple)):
+        return "[" + ", ".join(_stable_repr(v) for v in value) + "]"
+    return repr(value)
+
+
+def code_version(func):
+    # Kode node ikut menentukan versi: deploy yang mengubah node -- atau helper proyek yang
+    # dipanggilnya (transitif, mis. canonical_province, survey_weights), atau konstanta global
+    # yang dirujuknya -- memicu hitung ulang. Memakai source (bukan id/objek) agar versinya sama
+    # di semua proses.
+    parts, seen, pending = [], set(), [func]
+    while pending:
+        obj = pending.pop()
+        if id(obj) in seen:
+            continue
+        seen.add(id(obj))
+        try:
+            parts.append(inspect.getsource(obj))
+        except (OSError, TypeError):
+            parts.append(obj.__code__.co_code.hex())
+        code = getattr(obj, "__code__", None)
+        if code is None:
+            continue
+        for name in sorted(_referenced_names(code)):
+            if name not in obj.__globals__:
+                continue
+            value = obj.__globals__[name]
+            if (inspect.isfunction(value) or inspect.isclass(value)) and _is_project_object(value):
+                pending.append(value)
+            elif isinstance(value, (str, int, float, bool, tuple, list, dict, set, frozenset)):
+                parts.append(f"{name} = {_stable_repr(value)}")
+    return hashlib.sha1("\n".join(parts).encode()).hexdigest()
+
+
+# Setiap kolom/tabel turunan dideklarasikan sekali beserta input-nya. Versi node = hash versi
+# input-nya (node sumber: path + mtime + ukuran file), sehingga node hanya dihitung ulang bila
+# ada sumber di hulunya yang berubah; node lain memakai hasil tersimpan (memori, lalu disk).
+class Pipeline:
+    def __init__(self, cache_dir=None):
+        self.nodes = {}
+        self.cache_dir = cache_dir
+        self._results = {}
+        self._stats = {}
+        self._lock = threading.Lock()
+
+    def _register(self, name, inputs, func, fingerprint=None, code=None):
+        if name in self.nodes:
+            raise ValueError(f"Node '{name}' sudah dideklarasikan")
+        self.nodes[name] = {
+            "inputs": tuple(inputs),
+            "func": func,
+            "fingerprint": fingerprint,
+            "code": code_version(code or func),
+        }
+
+    def source(self, name, path, loader):
+        def fingerprint():
+            stat = os.stat(path)
+            return (os.path.abspath(path), stat.st_mtime_ns, stat.st_size)
+
+        self._register(name, (), lambda: loader(path), fingerprint, code=loader)
+
+    def parameter(self, name, read):
+        # Nilai konfigurasi (mis. environment variable) sebagai node sumber: versinya = nilainya
+        self._register(name, (), read, fingerprint=read)
+
+    def node(self, name, inputs):
+        def register(func):
+            self._register(name, inputs, func)
+            return func
+        return register
+
+    def order(self, targets=None):
+        # Urutan topologis (DFS) atas node yang dibutuhkan target; galat bila ada siklus
+        pending = list(self.nodes) if targets is None else list(targets)
+        ordered, state = [], {}
+
+        def visit(name, path):
+            if state.get(name) == "done":
+                return
+            if state.get(name) == "visiting":
+                raise ValueError("Siklus dependensi: " + " -> ".join(path + [name]))
+            if name not in self.nodes:
+                raise KeyError(f"Node '{name}' tidak dideklarasikan (dibutuhkan oleh {path[-1] if path else '-'})")
+            state[name] = "visiting"
+            for dep in self.nodes[name]["inputs"]:
+                visit(dep, path + [name])
+            state[name] = "done"
+            ordered.append(name)
+
+        for name in pending:
+            visit(name, [])
+        return ordered
+
+    def versions(self, targets=None):
+        # Versi tiap node tanpa menghitung apa pun (cukup stat file sumber)
+        versions = {}
+        for name in self.order(targets):
+            spec = self.nodes[name]
+            key = spec["fingerprint"]() if spec["fingerprint"] else [versions[dep] for dep in spec["inputs"]]
+            versions[name] = hashlib.sha1(repr((name, key, spec["code"])).encode()).hexdigest()[:12]
+        return versions
+
+    def _spill_path(self, name, version):
+        return os.path.join(self.cache_dir, f"{name}.{version}.pkl")
+
+    def _read_spill(self, name, version):
+        if self.cache_dir is None:
+            return None
+        try:
+            with open(self._spill_path(name, version), "rb") as f:
+                return pickle.load(f)
+        except (OSError, EOFError, pickle.UnpicklingError):
+            return None
+
+    def _write_spill(self, name, version, value, stats):
+        if self.cache_dir is None:
+            return
+        os.makedirs(self.cache_dir, mode=0o700, exist_ok=True)
+        path = self._spill_path(name, version)
+        staging = f"{path}.{os.getpid()}.tmp"
+        with open(staging, "wb") as f:
+            pickle.dump({"value": value, "stats": stats}, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(staging, path)
+        # Versi lama node ini tidak akan dipakai lagi
+        for entry in os.scandir(self.cache_dir):
+            if entry.name.startswith(f"{name}.") and entry.name.endswith(".pkl") and entry.path != path:
+                os.remove(entry.path)
+
+    def _resolve(self, name, versions, resolved):
+        # Input hanya dimuat/dihitung bila node ini sendiri harus dihitung ulang;
+        # resolved: node yang sudah selesai pada run ini (statistiknya tidak ditimpa lagi)
+        if name in resolved:
+            return resolved[name]
+        resolved[name] = value = self._resolve_uncached(name, versions, resolved)
+        return value
+
+    def _resolve_uncached(self, name, versions, resolved):
+        version = versions[name]
+        cached = self._results.get(name)
+        if cached is not None and cached[0] == version:
+            self._stats[name]["reused"] = True
+            return cached[1]
+
+        spilled = self._read_spill(name, version)
+        if spilled is not None:
+            self._results[name] = (version, spilled["value"])
+            self._stats[name] = {**spilled["stats"], "reused": True}
+            return spilled["value"]
+
+        spec = self.nodes[name]
+        inputs = [self._resolve(dep, versions, resolved) for dep in spec["inputs"]]
+        start = time.perf_counter()
+        value = spec["func"](*inputs)
+        stats = {"seconds": time.perf_counter() - start, "version": version, "computed_at": datetime.now()}
+        self._results[name] = (version, value)
+        self._stats[name] = {**stats, "reused": False}
+        self._write_spill(name, version, value, stats)
+        return value
+
+    def run(self, targets=None):
+        with self._lock:
+            versions = self.versions(targets)
+            names = list(versions) if targets is None else list(targets)
+            resolved = {}
+            return {name: self._resolve(name, versions, resolved) for name in names}
+
+    def release(self):
+        # Lepas hasil di memori (termasuk tahap antara); statistik durasi tetap. Dengan cache_dir,
+        # run berikutnya memuat node yang versinya tidak berubah dari disk, bukan menghitung ulang.
+        with self._lock:
+            self._results.clear()
+
+    def timings(self):
+        # Durasi perhitungan terakhir tiap tahap (gratis dari eksekusi DAG)
+        rows = [
+            {
+                "Tahap": name,
+                "Input": ", ".join(self.nodes[name]["inputs"]) or "(file)",
+                "Durasi (ms)": stats["seconds"] * 1000,
+                "Versi": stats["version"],
+                "Dihitung Pada": stats["computed_at"].strftime("%H:%M:%S"),
+                "Run Terakhir": "cache" if stats["reused"] else "dihitung",
+            }
+            for name, stats in self._stats.items()
+        ]
+        return pd.DataFrame(rows)
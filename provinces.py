@@ -0,0 +1,77 @@
+import pandas as pd
+
+# ==================== NAMA PROVINSI KANONIK ====================
+# Mengikuti penamaan di Regional_Economic_Indicators.csv / GenZ_Financial_Profile.csv (38 provinsi)
+CANONICAL_PROVINCES = [
+    "Aceh", "Sumatera Utara", "Sumatera Barat", "Riau", "Kepulauan Riau", "Jambi",
+    "Sumatera Selatan", "Kepulauan Bangka Belitung", "Bengkulu", "Lampung",
+    "DKI Jakarta", "Jawa Barat", "Banten", "Jawa Tengah", "DI Yogyakarta", "Jawa Timur",
+    "Bali", "Nusa Tenggara Barat", "Nusa Tenggara Timur",
+    "Kalimantan Barat", "Kalimantan Tengah", "Kalimantan Selatan", "Kalimantan Timur", "Kalimantan Utara",
+    "Sulawesi Utara", "Gorontalo", "Sulawesi Tengah", "Sulawesi Barat", "Sulawesi Selatan", "Sulawesi Tenggara",
+    "Maluku", "Maluku Utara",
+    "Papua", "Papua Barat", "Papua Barat Daya", "Papua Tengah", "Papua Pegunungan", "Papua Selatan",
+]
+
+# Ejaan lain / salah ketik (data regional) dan nama bahasa Inggris (survei literasi)
+PROVINCE_ALIASES = {
+    "Nangrou Aceh Darusalam": "Aceh",
+    "Nanggroe Aceh Darussalam": "Aceh",
+    "Kepualauan Bangka Belitung": "Kepulauan Bangka Belitung",
+    "Bangka Belitung Islands": "Kepulauan Bangka Belitung",
+    "North Sumatera": "Sumatera Utara",
+    "West Sumatera": "Sumatera Barat",
+    "South Sumatera": "Sumatera Selatan",
+    "Riau Islands": "Kepulauan Riau",
+    "West Java": "Jawa Barat",
+    "Central Java": "Jawa Tengah",
+    "East Java": "Jawa Timur",
+    "Special Region of Yogyakarta": "DI Yogyakarta",
+    "West Nusa Tenggara": "Nusa Tenggara Barat",
+    "East Nusa Tenggara": "Nusa Tenggara Timur",
+    "West Kalimantan": "Kalimantan Barat",
+    "Central Kalimantan": "Kalimantan Tengah",
+    "South Kalimantan": "Kalimantan Selatan",
+    "East Kalimantan": "Kalimantan Timur",
+    "North Kalimantan": "Kalimantan Utara",
+    "North Sulawesi": "Sulawesi Utara",
+    "Central Sulawesi": "Sulawesi Tengah",
+    "West Sulawesi": "Sulawesi Barat",
+    "South Sulawesi": "Sulawesi Selatan",
+    "Southeast Sulawesi": "Sulawesi Tenggara",
+    "North Maluku": "Maluku Utara",
+    "West Papua": "Papua Barat",
+    "Southwest Papua": "Papua Barat Daya",
+    "Central Papua": "Papua Tengah",
+    "Highland Papua": "Papua Pegunungan",
+    "South Papua": "Papua Selatan",
+    # Penamaan umum di file batas wilayah (GADM / geoBoundaries)
+    "Jakarta Raya": "DKI Jakarta",
+    "Daerah Khusus Ibukota Jakarta": "DKI Jakarta",
+    "Yogyakarta": "DI Yogyakarta",
+    "Daerah Istimewa Yogyakarta": "DI Yogyakarta",
+    "Bangka Belitung": "Kepulauan Bangka Belitung",
+}
+
+
+def _name_key(series):
+    # Kunci pencocokan: huruf kecil, spasi/tanda hubung beruntun dianggap satu spasi
+    return series.str.casefold().str.replace(r"[\s\-]+", " ", regex=True).str.strip()
+
+
+# Nama kanonik & alias dicocokkan tanpa peduli kapitalisasi/spasi ("JAWA BARAT", "Jawa  Barat")
+_PROVINCE_LOOKUP = dict(zip(
+    _name_key(pd.Series([*CANONICAL_PROVINCES, *PROVINCE_ALIASES], dtype="string")),
+    [*CANONICAL_PROVINCES, *PROVINCE_ALIASES.values()],
+))
+
+
+def canonical_province(series):
+    # Nama yang tidak dikenal dikembalikan apa adanya (tanpa spasi tepi)
+    names = series.astype("string").str.strip()
+    return _name_key(names).map(_PROVINCE_LOOKUP).fillna(names).astype(object)
+
+
+def province_codes(series):
+    # Kode integer stabil (indeks di CANONICAL_PROVINCES); -1 untuk nama tak dikenal
+    return pd.Categorical(series, categories=CANONICAL_PROVINCES).codes
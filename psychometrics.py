@@ -0,0 +1,296 @@
+import re
+
+import numpy as np
+import pandas as pd
+
+# ==================== ITEM KUESIONER ====================
+# Item literasi keuangan
+LITERACY_ITEMS = [
+    "I am able to identify risks and discrepancies and view numbers in a complex way",
+    "I am able to recognize a good financial investment",
+    "I am able to understand what is behind the numbers",
+    "I am able to and divide it accordingly across an allotted period to the right concerned areas",
+    "I am able to project the amount of cash that will be available to me in the future",
+    "I am able to plan ahead to avoid impulse spending",
+    "I am able to understand numbers and financial metrics",
+    "I am able to understand what drives cash flow and profits",
+    "I am able to understand the company's financial statements and some core performance measures",
+    "Awareness about the potential of financial risk in using digital financial provider or fintech such as the legality of the fintech provider interest rate and transaction fee",
+    "Having experience in using the product and service of fintech for digital payment",
+    "Experience in using the product and service of fintech for financing (loan) and investment",
+    "Experience in using the product and service of fintech for asset management",
+    "Having a good understanding of digital payment products such as E-Debit E-Credit  E-Money   Mobile/Internet banking  E -wallet",
+    "Having a good understanding of product digital asset management",
+    "Having a good understanding of digital alternatives",
+    "Having a good understanding of digital insurance",
+    "Having a good understanding of customer rights and protection as well as the procedure to complain about the service from digital  financial providers"
+]
+
+# Item perilaku keuangan & pengambilan keputusan
+BEHAVIOR_ITEMS = [
+    "I take part in domestic expense planning", "I usually have a critical view of the way my friends deal with money",
+    "I like to participate in family decision making when we buy something expensive for home",
+    "I advise others on money matters", "I always try to save some money to do things I really like",
+    "I always like to negotiate prices when I buy", "I suggest at home that we keep money aside for emergencies",
+    "I keep an eye on promotions and discounts", "I like to think thoroughly before deciding to buy something",
+    "I like to research prices whenever I buy something", "I pay attention to news about the economy as it may affect my family",
+    "I often do things without giving them much thought", "I am impulsive", "I say things before I have thought them through"
+]
+
+DECISION_ITEMS = [
+    "I am able to quickly change my financial decisions as per the changes in circumstance",
+    "Appraise of personal risk helps me in better financial decision making",
+    "I make sound financial decision by comparing results over the time",
+    "I make sound financial decisions by comparing results over expenses involved",
+    "I am able to search for economic options during financial decision making",
+    "I am able to foresee the long term and short-term consequences of the financial decisions I undertake",
+    "Previously used decision strategies help me in better financial decision making",
+    "I am becoming financially secure", "I am securing my financial future",
+    "I will achieve the financial goals that I have set for myself",
+    "I have saved (or will be able to save) enough money to last me to the end of my life",
+    "Because of my money situation I feel I will never have the things I want in life",
+    "I am behind with my finances", "My finances control my life",
+    "Whenever I feel in control of my finances something happens that sets me back",
+    "I am unable to enjoy life because I obsess too much about money"
+]
+
+# ==================== ITEM BERARAH TERBALIK ====================
+# Item berikut bermakna negatif: skor tinggi = perilaku/kondisi keuangan yang buruk.
+# Harus dibalik (reverse-coded) sebelum dirata-rata bersama item lain.
+REVERSE_KEYED_ITEMS = [
+    "I often do things without giving them much thought",
+    "I am impulsive",
+    "I say things before I have thought them through",
+    "Because of my money situation I feel I will never have the things I want in life",
+    "I am behind with my finances",
+    "My finances control my life",
+    "Whenever I feel in control of my finances something happens that sets me back",
+    "I am unable to enjoy life because I obsess too much about money",
+]
+
+SCALE_MIN, SCALE_MAX = 1, 4
+
+# Diagnostik konstruk tidak dilaporkan untuk subkelompok sekecil ini (setelah baris tak lengkap
+# dibuang): alpha & analisis faktor dari segelintir responden tidak bermakna
+MIN_DIAGNOSTIC_N = 30
+
+
+# ==================== PENCOCOKAN KOLOM ====================
+def normalize_label(text):
+    # Abaikan huruf besar, tanda baca, dan spasi ganda (mis. "situation, I" vs "situation I")
+    text = re.sub(r"[^0-9a-z]+", " ", str(text).lower())
+    return re.sub(r"\s+", " ", text).strip()
+
+
+def match_items(columns, items):
+    normalized = [(col, normalize_label(col)) for col in columns]
+    matched = []
+    for item in items:
+        key = normalize_label(item)
+        match = [col for col, norm in normalized if key in norm]
+        if match and match[0] not in matched:
+            matched.append(match[0])
+    return matched
+
+
+def reverse_code(df, columns, scale_min=SCALE_MIN, scale_max=SCALE_MAX):
+    if not columns:
+        return df
+    df = df.copy()
+    df[columns] = (scale_min + scale_max) - df[columns].apply(pd.to_numeric, errors="coerce")
+    return df
+
+
+# ==================== MOMEN ITEM (SATU KALI HITUNG) ====================
+def cell_codes(df, group_cols):
+    # Kode sel = kombinasi nilai group_cols (mis. gender × provinsi), atas semua baris
+    groups = df[group_cols].fillna("Tidak diketahui").astype(str)
+    cells = groups.drop_duplicates().reset_index(drop=True)
+    codes = groups.groupby(group_cols, sort=False).ngroup().to_numpy()
+    return cells, codes
+
+
+def item_moments(df, columns, codes, n_cells):
+    # Matriks item (baris lengkap untuk kolom ini saja), nilai di luar skala dianggap hilang
+    values = df[columns].apply(pd.to_numeric, errors="coerce").to_numpy(dtype=float)
+    values[(values < SCALE_MIN) | (values > SCALE_MAX)] = np.nan
+    complete = ~np.isnan(values).any(axis=1)
+    values, codes = values[complete], codes[complete]
+
+    # Urutkan sekali, lalu tiap sel cukup satu perkalian matriks pada irisan kontigu
+    order = np.argsort(codes, kind="stable")
+    values, codes = values[order], codes[order]
+    bounds = np.searchsorted(codes, np.arange(n_cells + 1))
+
+    n_items = len(columns)
+    counts = np.diff(bounds).astype(float)
+    sums = np.zeros((n_cells, n_items))
+    cross = np.zeros((n_cells, n_items, n_items))
+    for g in range(n_cells):
+        block = values[bounds[g]:bounds[g + 1]]
+        sums[g] = block.sum(axis=0)
+        cross[g] = block.T @ block
+
+    return {
+        "columns": list(columns),
+        "counts": counts,
+        "sums": sums,
+        "cross": cross,
+    }
+
+
+def scale_moments(df, scales, group_cols):
+    # Penghapusan listwise per skala: responden yang lengkap untuk satu skala tetap dihitung di
+    # skala itu walau item skala lain kosong. Semua skala berbagi indeks sel yang sama.
+    cells, codes = cell_codes(df, group_cols)
+    return {
+        "cells": cells,
+        "scales": {
+            name: item_moments(df, columns, codes, len(cells))
+            for name, columns in scales.items() if columns
+        },
+    }
+
+
+def subgroup_covariance(moments, cell_mask=None, columns=None):
+    # Momen bersifat aditif: subkelompok mana pun = jumlah sel yang dipilih
+    if cell_mask is None:
+        cell_mask = np.ones(len(moments["counts"]), dtype=bool)
+    idx = np.arange(len(moments["columns"]))
+    if columns is not None:
+        position = {col: i for i, col in enumerate(moments["columns"])}
+        idx = np.array([position[col] for col in columns if col in position], dtype=int)
+
+    n = moments["counts"][cell_mask].sum()
+    if n < 2 or len(idx) == 0:
+        return int(n), None
+    s = moments["sums"][cell_mask][:, idx].sum(axis=0)
+    c = moments["cross"][cell_mask][:, idx][:, :, idx].sum(axis=0)
+    cov = (c - np.outer(s, s) / n) / (n - 1)
+    return int(n), cov
+
+
+# ==================== RELIABILITAS ====================
+def cronbach_alpha(cov):
+    k = cov.shape[0]
+    total_var = cov.sum()
+    if k < 2 or total_var <= 0:
+        return np.nan
+    return k / (k - 1) * (1 - np.trace(cov) / total_var)
+
+
+def item_total_correlations(cov):
+    # Korelasi item–total terkoreksi: item vs total tanpa item itu sendiri
+    item_var = np.diag(cov)
+    row_sum = cov.sum(axis=1)
+    cov_rest = row_sum - item_var
+    var_rest = cov.sum() - 2 * row_sum + item_var
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return cov_rest / np.sqrt(item_var * var_rest)
+
+
+# ==================== ANALISIS FAKTOR EKSPLORATORI ====================
+def covariance_to_correlation(cov):
+    sd = np.sqrt(np.diag(cov))
+    with np.errstate(divide="ignore", invalid="ignore"):
+        corr = cov / np.outer(sd, sd)
+    corr = np.nan_to_num(corr)
+    np.fill_diagonal(corr, 1.0)
+    return corr
+
+
+def varimax(loadings, max_iter=100, tol=1e-6):
+    p, k = loadings.shape
+    if k < 2:
+        return loadings
+    rotation = np.eye(k)
+    criterion = 0.0
+    for _ in range(max_iter):
+        rotated = loadings @ rotation
+        u, s, vt = np.linalg.svd(
+            loadings.T @ (rotated ** 3 - rotated @ np.diag((rotated ** 2).sum(axis=0)) / p)
+        )
+        rotation = u @ vt
+        new_criterion = s.sum()
+        if new_criterion - criterion < tol * new_criterion:
+            break
+        criterion = new_criterion
+    return loadings @ rotation
+
+
+def factor_analysis(cov, n_factors=None, max_iter=50, tol=1e-4):
+    # Principal axis factoring; jumlah faktor default mengikuti kriteria Kaiser (eigen > 1)
+    corr = covariance_to_correlation(cov)
+    eigenvalues = np.linalg.eigvalsh(corr)[::-1]
+    if n_factors is None:
+        n_factors = max(1, int((eigenvalues > 1).sum()))
+
+    # Komunalitas awal = squared multiple correlation; matriks singular (item kolinear/konstan)
+    # tidak punya invers -> korelasi absolut terbesar tiap item
+    if np.linalg.matrix_rank(corr) == len(corr):
+        communality = 1 - 1 / np.diag(np.linalg.inv(corr))
+    else:
+        communality = np.abs(corr - np.eye(len(corr))).max(axis=1)
+    communality = np.clip(np.nan_to_num(communality), 0, 1)
+
+    reduced = corr.copy()
+    for _ in range(max_iter):
+        np.fill_diagonal(reduced, communality)
+        values, vectors = np.linalg.eigh(reduced)
+        top = np.argsort(values)[::-1][:n_factors]
+        loadings = vectors[:, top] * np.sqrt(np.clip(values[top], 0, None))
+        new_communality = (loadings ** 2).sum(axis=1)
+        if np.max(np.abs(new_communality - communality)) < tol:
+            communality = new_communality
+            break
+        communality = new_communality
+
+    # Arah faktor bebas tanda; samakan agar muatan dominan bernilai positif
+    rotated = varimax(loadings)
+    rotated = rotated * np.where(rotated.sum(axis=0) < 0, -1, 1)
+    return rotated, eigenvalues
+
+
+# ==================== DIAGNOSTIK PER KONSTRUK ====================
+def diagnostic_min_n(n_items):
+    return max(MIN_DIAGNOSTIC_N, n_items + 1)
+
+
+def construct_diagnostics(moments, constructs, cell_mask=None):
+    # constructs: {nama tampilan: kunci skala di moments["scales"]}
+    reverse_keys = {normalize_label(item) for item in REVERSE_KEYED_ITEMS}
+    summary, items, loadings = [], [], {}
+
+    for name, scale in constructs.items():
+        if scale not in moments["scales"]:
+            continue
+        scale_moments = moments["scales"][scale]
+        columns = scale_moments["columns"]
+        n, cov = subgroup_covariance(scale_moments, cell_mask)
+        min_n = diagnostic_min_n(len(columns))
+        row = {"Konstruk": name, "Jumlah Item": len(columns), "N": n, "N Minimum": min_n}
+        if cov is None or len(columns) < 2 or n < min_n:
+            summary.append({**row, "Cronbach's Alpha": np.nan})
+            continue
+        summary.append({**row, "Cronbach's Alpha": cronbach_alpha(cov)})
+
+        r_it = item_total_correlations(cov)
+        for col, r in zip(columns, r_it):
+            items.append({
+                "Konstruk": name,
+                "Item": col,
+                "Dibalik": any(key in normalize_label(col) for key in reverse_keys),
+                "Korelasi Item-Total": r,
+                "Alpha jika Item Dihapus": cronbach_alpha(
+                    np.delete(np.delete(cov, columns.index(col), axis=0), columns.index(col), axis=1)
+                ),
+            })
+
+        factor_loadings, _ = factor_analysis(cov)
+        loadings[name] = pd.DataFrame(
+            factor_loadings,
+            index=columns,
+            columns=[f"Faktor {i + 1}" for i in range(factor_loadings.shape[1])],
+        )
+
+    return pd.DataFrame(summary), pd.DataFrame(items), loadings
@@ -0,0 +1,94 @@
+import numpy as np
+
+# ==================== KLL QUANTILE SKETCH ====================
+# Sketsa kuantil yang bisa digabung (mergeable): ukuran tetap ~O(k), galat peringkat ~1/k.
+# Level h menyimpan item berbobot 2^h; level penuh dipadatkan dengan membuang setengah item.
+CAPACITY_DECAY = 2 / 3
+
+
+class KLLSketch:
+    def __init__(self, k=400, seed=0):
+        self.k = k
+        self.n = 0
+        self.compactors = [np.empty(0)]
+        self._rng = np.random.default_rng(seed)
+
+    def _capacity(self, level):
+        depth = len(self.compactors) - level - 1
+        return max(2, int(np.ceil(self.k * CAPACITY_DECAY ** depth)))
+
+    def _compress(self):
+        level = 0
+        while level < len(self.compactors):
+            buffer = self.compactors[level]
+            if len(buffer) > self._capacity(level):
+                if level + 1 == len(self.compactors):
+                    self.compactors.append(np.empty(0))
+                buffer = np.sort(buffer)
+                # Jumlah ganjil: satu item tertinggal di level ini
+                leftover = buffer[len(buffer) - len(buffer) % 2:]
+                buffer = buffer[:len(buffer) - len(buffer) % 2]
+                promoted = buffer[self._rng.integers(2)::2]
+                self.compactors[level] = leftover
+                self.compactors[level + 1] = np.concatenate([self.compactors[level + 1], promoted])
+            level += 1
+
+    def update(self, values):
+        values = np.asarray(values, dtype=float).ravel()
+        values = values[~np.isnan(values)]
+        if len(values) == 0:
+            return self
+        self.compactors[0] = np.concatenate([self.compactors[0], values])
+        self.n += len(values)
+        self._compress()
+        return self
+
+    def merge(self, other):
+        merged = KLLSketch(max(self.k, other.k), seed=self._rng.integers(2 ** 31))
+        height = max(len(self.compactors), len(other.compactors))
+        merged.compactors = [
+            np.concatenate([
+                self.compactors[h] if h < len(self.compactors) else np.empty(0),
+                other.compactors[h] if h < len(other.compactors) else np.empty(0),
+            ])
+            for h in range(height)
+        ]
+        merged.n = self.n + other.n
+        merged._compress()
+        return merged
+
+    def quantiles(self, qs):
+        qs = np.atleast_1d(np.asarray(qs, dtype=float))
+        if self.n == 0:
+            return np.full(len(qs), np.nan)
+        items = np.concatenate(self.compactors)
+        weights = np.concatenate([np.full(len(c), 2.0 ** h) for h, c in enumerate(self.compactors)])
+        order = np.argsort(items, kind="stable")
+        items, cumulative = items[order], np.cumsum(weights[order])
+        idx = np.searchsorted(cumulative, qs * cumulative[-1], side="left")
+        return items[np.clip(idx, 0, len(items) - 1)]
+
+
+# ==================== SKETSA PER SEL (PROVINSI × GENDER) ====================
+def update_cell_sketches(sketches, df, cell_cols, value_cols, k=400):
+    # Inkremental: baris baru cukup dimasukkan ke sketsa sel masing-masing
+    values = {col: df[col].to_numpy(dtype=float) for col in value_cols}
+    for key, rows in df.groupby(cell_cols, sort=False).indices.items():
+        key = key if isinstance(key, tuple) else (key,)
+        cell = sketches.setdefault(key, {col: KLLSketch(k) for col in value_cols})
+        for col in value_cols:
+            cell.setdefault(col, KLLSketch(k)).update(values[col][rows])
+    return sketches
+
+
+def build_cell_sketches(df, cell_cols, value_cols, k=400):
+    return update_cell_sketches({}, df, cell_cols, value_cols, k)
+
+
+def merged_sketch(sketches, column, keep=None):
+    # Kombinasi filter apa pun = gabungan beberapa sketsa sel, tanpa mengurutkan kolom mentah
+    result = KLLSketch()
+    for key, cell in sketches.items():
+        if keep is None or keep(key):
+            result = result.merge(cell[column])
+    return result
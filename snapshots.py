@@ -0,0 +1,187 @@
+import argparse
+import hashlib
+import os
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.dataset as ds
+import pyarrow.parquet as pq
+
+# ==================== SNAPSHOT REGIONAL PER PERIODE ====================
+# Layout kolumnar terpartisi (Hive):
+#   <root>/periods/period=YYYY-MM/regional.parquet  satu baris per provinsi, urut provinsi
+#   <root>/summaries.parquet                        satu baris ringkasan nasional per periode
+# Tren cukup membaca ringkasan; rincian provinsi hanya membaca partisi periode yang diminta.
+SNAPSHOT_DIR = os.environ.get("REGIONAL_SNAPSHOT_DIR", os.path.join("snapshots", "regional"))
+PARTITION_DIR = "periods"
+SUMMARY_FILE = "summaries.parquet"
+PERIOD_FORMAT = "%Y-%m"
+
+SNAPSHOT_COLUMNS = [
+    "province",
+    "active_loan_accounts",
+    "loan_amount_billion",
+    "lender_accounts",
+    "twp_90",
+    "borrowers",
+    "outstanding_billion",
+    "population_thousand",
+    "pdrb_thousand_rp",
+    "urbanization_rate",
+]
+SUM_COLUMNS = [
+    "outstanding_billion",
+    "loan_amount_billion",
+    "borrowers",
+    "active_loan_accounts",
+    "lender_accounts",
+    "population_thousand",
+]
+
+TREND_METRICS = {
+    "outstanding_billion": "Outstanding Pinjaman (Rp miliar)",
+    "loan_amount_billion": "Dana Diberikan (Rp miliar)",
+    "borrowers": "Jumlah Penerima Pinjaman",
+    "twp_90": "TWP 90% (%)",
+}
+
+# Hasil ingest
+INGEST_WRITTEN = "disimpan"
+INGEST_UNCHANGED = "tidak berubah"
+INGEST_CONFLICT = "konflik"
+
+PARTITIONING = ds.partitioning(pa.schema([("period", pa.string())]), flavor="hive")
+
+
+# ==================== PERIODE ====================
+def normalize_period(period):
+    return pd.Period(str(period), freq="M").strftime(PERIOD_FORMAT)
+
+
+def snapshot_period():
+    # Periode data harus dinyatakan (REGIONAL_PERIOD, mis. "2025-10"); tanpa itu tidak ada ingest
+    # otomatis -- waktu modifikasi file bukan periode datanya
+    period = os.environ.get("REGIONAL_PERIOD")
+    return normalize_period(period) if period else None
+
+
+# ==================== RINGKASAN PER PERIODE ====================
+def content_hash(df):
+    return hashlib.sha1(pd.util.hash_pandas_object(df, index=False).to_numpy().tobytes()).hexdigest()[:12]
+
+
+def summarize_snapshot(df, period):
+    row = {"period": period, "provinces": int(df["province"].nunique())}
+    for col in SUM_COLUMNS:
+        row[col] = float(df[col].sum(min_count=1)) if col in df.columns else np.nan
+    # TWP 90 nasional: rata-rata provinsi tertimbang outstanding pinjaman
+    valid = df[["twp_90", "outstanding_billion"]].dropna()
+    valid = valid[valid["outstanding_billion"] > 0]
+    row["twp_90"] = float(np.average(valid["twp_90"], weights=valid["outstanding_billion"])) if len(valid) else np.nan
+    return row
+
+
+def read_summaries(root=SNAPSHOT_DIR):
+    path = os.path.join(root, SUMMARY_FILE)
+    if not os.path.exists(path):
+        return pd.DataFrame(columns=["period", "provinces", *SUM_COLUMNS, "twp_90", "content_hash", "ingested_at"])
+    return pq.read_table(path).to_pandas().sort_values("period").reset_index(drop=True)
+
+
+def period_changes(frame, column, group_col=None):
+    # Selisih & pertumbuhan (%) terhadap periode sebelumnya (per grup bila ada)
+    frame = frame.sort_values([group_col, "period"] if group_col else "period").copy()
+    values = frame.groupby(group_col)[column] if group_col else frame[column]
+    previous = values.shift(1)
+    frame["delta"] = frame[column] - previous
+    frame["growth_pct"] = np.where(previous.abs() > 0, 100 * frame["delta"] / previous.abs(), np.nan)
+    return frame
+
+
+# ==================== INGEST ====================
+def _write_atomic(table, path):
+    staging = f"{path}.{os.getpid()}.tmp"
+    pq.write_table(table, staging)
+    os.replace(staging, path)
+
+
+def ingest_snapshot(df, period, root=SNAPSHOT_DIR, force=False):
+    # Idempoten: isi yang sama dengan periode ini atau periode terakhir tidak ditulis ulang (file
+    # yang belum diperbarui tidak menjadi periode baru). Periode yang sudah ada dengan isi berbeda
+    # tidak ditimpa (kemungkinan file bulan baru dengan REGIONAL_PERIOD yang belum diganti),
+    # kecuali force=True (CLI --force).
+    period = normalize_period(period)
+    snapshot = df[[col for col in SNAPSHOT_COLUMNS if col in df.columns]].copy()
+    snapshot["province"] = snapshot["province"].astype(str)
+    snapshot = snapshot.sort_values("province").reset_index(drop=True)
+    digest = content_hash(snapshot)
+
+    summaries = read_summaries(root)
+    existing = summaries[summaries["period"] == period]
+    if not existing.empty and existing["content_hash"].iloc[0] == digest:
+        return INGEST_UNCHANGED
+    if len(summaries) and summaries["content_hash"].iloc[-1] == digest:
+        return INGEST_UNCHANGED
+    if not existing.empty and not force:
+        return INGEST_CONFLICT
+
+    partition = os.path.join(root, PARTITION_DIR, f"period={period}")
+    os.makedirs(partition, exist_ok=True)
+    _write_atomic(pa.Table.from_pandas(snapshot, preserve_index=False), os.path.join(partition, "regional.parquet"))
+
+    row = pd.DataFrame([{**summarize_snapshot(snapshot, period), "content_hash": digest, "ingested_at": pd.Timestamp.now()}])
+    others = summaries[summaries["period"] != period]
+    summaries = (pd.concat([others, row], ignore_index=True) if len(others) else row).sort_values("period")
+    _write_atomic(pa.Table.from_pandas(summaries, preserve_index=False), os.path.join(root, SUMMARY_FILE))
+    return INGEST_WRITTEN
+
+
+# ==================== BACA PARTISI ====================
+def read_partitions(periods=None, provinces=None, columns=None, root=SNAPSHOT_DIR):
+    path = os.path.join(root, PARTITION_DIR)
+    if not os.path.isdir(path):
+        return pd.DataFrame(columns=["period", *(columns or SNAPSHOT_COLUMNS)])
+    dataset = ds.dataset(path, format="parquet", partitioning=PARTITIONING)
+
+    # Filter periode memangkas partisi (direktori); filter provinsi memakai statistik row group
+    condition = None
+    if periods is not None:
+        condition = ds.field("period").isin(list(periods))
+    if provinces is not None:
+        by_province = ds.field("province").isin(list(provinces))
+        condition = by_province if condition is None else condition & by_province
+
+    wanted = None if columns is None else ["period", *[col for col in columns if col != "period"]]
+    return dataset.to_table(columns=wanted, filter=condition).to_pandas().sort_values("period", kind="stable")
+
+
+# ==================== CLI ====================
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Penyimpanan snapshot indikator regional per periode.")
+    parser.add_argument("--root", default=SNAPSHOT_DIR)
+    commands = parser.add_subparsers(dest="command", required=True)
+    ingest = commands.add_parser("ingest", help="simpan satu file CSV regional sebagai snapshot periode")
+    ingest.add_argument("path")
+    ingest.add_argument("--period", help="YYYY-MM (default: REGIONAL_PERIOD)")
+    ingest.add_argument("--force", action="store_true", help="timpa periode yang sudah ada dengan isi berbeda")
+    commands.add_parser("list", help="tampilkan ringkasan semua periode")
+    args = parser.parse_args(argv)
+
+    if args.command == "ingest":
+        from datasets import clean_regional, read_file
+
+        period = normalize_period(args.period) if args.period else snapshot_period()
+        if period is None:
+            parser.error("periode wajib: berikan --period YYYY-MM atau set REGIONAL_PERIOD")
+        status = ingest_snapshot(clean_regional(read_file(args.path)), period, args.root, args.force)
+        if status == INGEST_CONFLICT:
+            parser.exit(1, f"Periode {period} sudah ada dengan isi berbeda; data lama dipertahankan "
+                           "(periksa periode, atau pakai --force untuk menimpa)\n")
+        print(f"Periode {period}: {status}")
+    else:
+        print(read_summaries(args.root).to_string(index=False))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,48 @@
+import os
+
+import pandas as pd
+import pytest
+from pandas.testing import assert_frame_equal
+
+import datasets
+from datasets import DATA_PATHS, read_file
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+FIXTURE = (
+    "name;city;name;;score;note\n"
+    "Andi;Jakarta;A;x;1.5;\n"
+    "Budi;;B;y;;Parent\x92s House\n"
+    "Citra;Bandung;;z;3.0;None\n"
+)
+
+
+@pytest.fixture
+def parallel_read(monkeypatch):
+    # Semua file dianggap "besar" agar melewati jalur Arrow
+    monkeypatch.setattr(datasets, "PARALLEL_READ_BYTES", 0)
+
+
+def reference(path):
+    try:
+        return pd.read_csv(path, delimiter=";", encoding="utf-8")
+    except UnicodeDecodeError:
+        return pd.read_csv(path, delimiter=";", encoding="ISO-8859-1")
+
+
+@pytest.mark.parametrize("name", DATA_PATHS.values())
+def test_parallel_read_matches_pandas_on_bundled_data(parallel_read, name):
+    path = os.path.join(REPO_DIR, name)
+    assert_frame_equal(read_file(path), reference(path))
+
+
+def test_parallel_read_matches_pandas_on_edge_cases(parallel_read, tmp_path):
+    # Header duplikat & kosong, teks kosong, byte Latin-1 di badan file
+    path = tmp_path / "fixture.csv"
+    path.write_bytes(FIXTURE.encode("ISO-8859-1"))
+    with pytest.raises(UnicodeDecodeError):
+        pd.read_csv(path, delimiter=";", encoding="utf-8")
+    expected = pd.read_csv(path, delimiter=";", encoding="ISO-8859-1")
+    df = read_file(str(path))
+    assert list(df.columns) == ["name", "city", "name.1", "Unnamed: 3", "score", "note"]
+    assert_frame_equal(df, expected)
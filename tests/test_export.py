@@ -0,0 +1,42 @@
+import io
+import os
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+import pytest
+
+from datasets import RUPIAH_LABEL_COLUMNS, export_columns, parse_rupiah_range
+from export import export_bytes
+
+
+@pytest.fixture
+def profile():
+    labels = pd.Series(["< Rp2.000.000", "Rp2.000.001 - Rp4.000.000", "> Rp15.000.000"] * 3)
+    df = pd.DataFrame({"user_id": [f"U{i}" for i in range(9)], "province": ["Aceh"] * 9})
+    for col, label_col in RUPIAH_LABEL_COLUMNS.items():
+        df[col] = parse_rupiah_range(labels)
+        df[label_col] = labels
+    return df
+
+
+def read_back(data, fmt):
+    if fmt == "CSV":
+        return pd.read_csv(io.BytesIO(data), sep=";")
+    if fmt == "Parquet":
+        return pq.read_table(io.BytesIO(data)).to_pandas()
+    return pa.ipc.open_stream(data).read_all().to_pandas()
+
+
+@pytest.mark.parametrize("fmt", ["CSV", "Parquet", "Arrow"])
+def test_export_writes_original_bracket_labels(profile, fmt):
+    positions = [0, 4, 8]
+    out = read_back(export_bytes(profile, fmt, positions, chunk_rows=2, columns=export_columns(profile)), fmt)
+    assert list(out.columns) == ["user_id", "province", *RUPIAH_LABEL_COLUMNS]
+    for col, label_col in RUPIAH_LABEL_COLUMNS.items():
+        assert out[col].tolist() == profile[label_col].iloc[positions].tolist()
+
+
+def test_export_without_rows_keeps_header(profile):
+    out = read_back(export_bytes(profile, "CSV", [], columns=export_columns(profile)), "CSV")
+    assert out.empty and list(out.columns) == ["user_id", "province", *RUPIAH_LABEL_COLUMNS]
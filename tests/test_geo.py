@@ -0,0 +1,54 @@
+import json
+import os
+
+import plotly.io as pio
+import pytest
+
+from geo import GEOJSON_PATH, check_boundaries, choropleth_base, province_choropleth, publish_level
+from provinces import CANONICAL_PROVINCES
+
+
+def square(lon, lat, size=0.5):
+    ring = [[lon, lat], [lon + size, lat], [lon + size, lat + size], [lon, lat + size], [lon, lat]]
+    return {"type": "Polygon", "coordinates": [ring]}
+
+
+@pytest.fixture
+def boundaries(tmp_path):
+    # Penamaan ala geoBoundaries/GADM: huruf besar & alias
+    names = [name.upper() for name in CANONICAL_PROVINCES]
+    names[names.index("DKI JAKARTA")] = "Daerah Khusus Ibukota Jakarta"
+    names[names.index("DI YOGYAKARTA")] = "Daerah Istimewa Yogyakarta"
+    features = [
+        {"type": "Feature", "properties": {"shapeName": name}, "geometry": square(95 + i, -5)}
+        for i, name in enumerate(names)
+    ]
+    path = tmp_path / "provinces.geojson"
+    path.write_text(json.dumps({"type": "FeatureCollection", "features": features}), encoding="utf-8")
+    return str(path)
+
+
+@pytest.mark.skipif(not os.path.exists(GEOJSON_PATH), reason="file batas provinsi belum diunduh (python geo.py fetch)")
+def test_bundled_boundaries_cover_all_provinces():
+    report = check_boundaries()
+    assert report["missing"] == []
+    assert report["unmatched"] == []
+
+
+def test_check_boundaries_matches_aliases(boundaries):
+    report = check_boundaries(boundaries)
+    assert report == {"features": 38, "unmatched": [], "missing": []}
+
+
+def test_geometry_is_referenced_not_embedded(boundaries, tmp_path):
+    from geo import load_province_geojson
+
+    geojson = load_province_geojson(boundaries)
+    url = publish_level(geojson, static_dir=str(tmp_path / "static"), url_prefix="app/static/geo")
+    assert url == publish_level(geojson, static_dir=str(tmp_path / "static"), url_prefix="app/static/geo")
+    assert len(os.listdir(tmp_path / "static")) == 1
+
+    fig = province_choropleth(choropleth_base(geojson, geometry_url=url), ["Aceh"], [1.0], "t", "v")
+    trace = fig.to_dict()["data"][0]
+    assert trace["geojson"] == url
+    assert "coordinates" not in pio.to_json(fig.to_dict(), validate=False)
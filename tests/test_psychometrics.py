@@ -0,0 +1,45 @@
+import warnings
+
+import numpy as np
+import pandas as pd
+
+from psychometrics import construct_diagnostics, factor_analysis, scale_moments
+
+
+def survey(n, seed=0):
+    rng = np.random.default_rng(seed)
+    latent = rng.normal(size=(n, 1))
+    values = np.clip(np.rint(2.5 + latent + rng.normal(scale=0.7, size=(n, 6))), 1, 4)
+    df = pd.DataFrame(values, columns=[f"q{i}" for i in range(6)])
+    df["Gender"] = np.where(np.arange(n) % 2, "Male", "Female")
+    df["Province of Origin"] = np.where(np.arange(n) < 3, "Kecil", "Besar")
+    return df
+
+
+def test_listwise_deletion_is_per_scale():
+    df = survey(100)
+    df.loc[:9, "q5"] = np.nan
+    moments = scale_moments(df, {"a": ["q0", "q1", "q2"], "b": ["q3", "q4", "q5"]}, ["Gender", "Province of Origin"])
+    assert moments["scales"]["a"]["counts"].sum() == 100
+    assert moments["scales"]["b"]["counts"].sum() == 90
+
+
+def test_small_subgroup_is_suppressed():
+    df = survey(100)
+    moments = scale_moments(df, {"a": ["q0", "q1", "q2"]}, ["Gender", "Province of Origin"])
+    mask = (moments["cells"]["Province of Origin"] == "Kecil").to_numpy()
+    summary, items, loadings = construct_diagnostics(moments, {"A": "a"}, mask)
+    assert summary.loc[0, "N"] == 3
+    assert np.isnan(summary.loc[0, "Cronbach's Alpha"])
+    assert items.empty and loadings == {}
+
+
+def test_factor_analysis_on_singular_matrix_is_finite():
+    base = np.array([[1.0, 0.5], [0.5, 1.0]])
+    cov = np.zeros((4, 4))
+    cov[:2, :2] = base
+    cov[2:, 2:] = np.ones((2, 2))
+    with warnings.catch_warnings():
+        warnings.simplefilter("error")
+        loadings, _ = factor_analysis(cov)
+    assert np.isfinite(loadings).all()
@@ -0,0 +1,182 @@
+import numpy as np
+import pandas as pd
+
+from provinces import CANONICAL_PROVINCES, province_codes
+
+# ==================== TARGET MARGINAL ====================
+REFERENCE_YEAR = 2025
+GEN_Z_BIRTH_YEARS = np.arange(1997, 2013)
+
+# Proporsi jenis kelamin nasional (rasio jenis kelamin ±102 laki-laki per 100 perempuan)
+GENDER_LEVELS = ["Male", "Female"]
+GENDER_SHARES = [0.505, 0.495]
+
+
+# ==================== RAKING (ITERATIVE PROPORTIONAL FITTING) ====================
+def rake(dim_codes, targets, base_weights=None, max_iter=100, tol=1e-6, trim=None):
+    # dim_codes: list array kode integer per dimensi (-1 = tidak diketahui, tidak ikut disesuaikan)
+    # targets:   list array proporsi target per level untuk tiap dimensi
+    dim_codes = [np.asarray(c, dtype=np.int64) for c in dim_codes]
+    sizes = [len(t) for t in targets]
+    n = len(dim_codes[0])
+    if n == 0:
+        return np.ones(0), {"converged": True, "iterations": 0, "max_gap": 0.0, "margins": [], "targets": []}
+
+    # Kumpulkan baris ke sel unik agar iterasi berjalan atas sel, bukan baris
+    shape = [s + 1 for s in sizes]
+    flat = np.ravel_multi_index(np.stack([c + 1 for c in dim_codes]), shape)
+    cells, inverse = np.unique(flat, return_inverse=True)
+    cell_codes = [c - 1 for c in np.unravel_index(cells, shape)]
+
+    base = np.ones(n) if base_weights is None else np.asarray(base_weights, dtype=float)
+    cell_base = np.bincount(inverse, weights=base, minlength=len(cells))
+    cell_w = cell_base.copy()
+
+    # Level tanpa responden tidak bisa diisi; target dinormalisasi ulang atas level yang teramati
+    fitted_targets = []
+    for codes, target, size in zip(cell_codes, targets, sizes):
+        valid = codes >= 0
+        observed = np.bincount(codes[valid], weights=cell_base[valid], minlength=size) > 0
+        target = np.where(observed, np.asarray(target, dtype=float), 0.0)
+        fitted_targets.append(target / target.sum() if target.sum() > 0 else target)
+
+    def margins(weights):
+        shares = []
+        for codes, size in zip(cell_codes, sizes):
+            valid = codes >= 0
+            margin = np.bincount(codes[valid], weights=weights[valid], minlength=size)
+            shares.append(margin / margin.sum() if margin.sum() > 0 else margin)
+        return shares
+
+    def margin_gap(weights):
+        # Selisih relatif terbesar antara margin tercapai dan target, atas semua dimensi
+        gaps = [
+            np.abs(share - target) / np.where(target > 0, target, 1.0)
+            for share, target in zip(margins(weights), fitted_targets)
+        ]
+        return max((gap.max() for gap in gaps if len(gap)), default=0.0)
+
+    iterations, max_gap = 0, margin_gap(cell_w)
+    while max_gap >= tol and iterations < max_iter:
+        iterations += 1
+        for codes, target, size in zip(cell_codes, fitted_targets, sizes):
+            valid = codes >= 0
+            if not valid.any():
+                continue
+            margin = np.bincount(codes[valid], weights=cell_w[valid], minlength=size)
+            goal = target * margin.sum()
+            factor = np.divide(goal, margin, out=np.ones(size), where=margin > 0)
+            cell_w[valid] *= factor[codes[valid]]
+
+        if trim is not None:
+            # Batasi rasio bobot terhadap bobot awal agar varians tidak meledak
+            ratio = np.divide(cell_w, cell_base, out=np.ones_like(cell_w), where=cell_base > 0)
+            cell_w = cell_base * np.clip(ratio, 1 / trim, trim)
+
+        # Diukur setelah trim: trim bisa membuat margin tidak pernah mencapai target
+        max_gap = margin_gap(cell_w)
+
+    # Sebar kembali ke baris (proporsional bobot awal), lalu normalisasi: rata-rata bobot = 1
+    ratio = np.divide(cell_w, cell_base, out=np.zeros_like(cell_w), where=cell_base > 0)
+    row_w = base * ratio[inverse]
+    total = row_w.sum()
+    report = {
+        "converged": bool(max_gap < tol),
+        "iterations": iterations,
+        "max_gap": float(max_gap),
+        "margins": margins(cell_w),
+        "targets": fitted_targets,
+    }
+    return (row_w * (n / total) if total > 0 else np.ones(n)), report
+
+
+# ==================== KODE DIMENSI ====================
+def gender_codes(series):
+    return pd.Categorical(series, categories=GENDER_LEVELS).codes
+
+
+def birth_year_codes(series):
+    years = pd.to_numeric(series, errors="coerce").to_numpy()
+    codes = np.searchsorted(GEN_Z_BIRTH_YEARS, years)
+    inside = np.isin(years, GEN_Z_BIRTH_YEARS)
+    return np.where(inside, codes, -1)
+
+
+def population_province_shares(df_regional):
+    # Target provinsi = proporsi jumlah penduduk (urutan CANONICAL_PROVINCES)
+    codes = province_codes(df_regional["province"])
+    population = pd.to_numeric(df_regional["population_thousand"], errors="coerce").fillna(0).to_numpy()
+    valid = codes >= 0
+    return np.bincount(codes[valid], weights=population[valid], minlength=len(CANONICAL_PROVINCES))
+
+
+def survey_weights(df, df_population, province_col="province", gender_col="gender",
+                   birth_year_col="birth_year", trim=5.0):
+    # Post-stratifikasi: provinsi ~ jumlah penduduk, gender ~ proporsi nasional,
+    # tahun lahir ~ seragam antar kohort Gen Z. Mengembalikan bobot + laporan konvergensi
+    # (margin tercapai vs target per dimensi; dengan trim, target bisa tidak tercapai).
+    dimensions = [
+        ("Provinsi", CANONICAL_PROVINCES, province_codes(df[province_col]), population_province_shares(df_population)),
+        ("Jenis Kelamin", GENDER_LEVELS, gender_codes(df[gender_col]), np.asarray(GENDER_SHARES)),
+        ("Tahun Lahir", GEN_Z_BIRTH_YEARS.tolist(), birth_year_codes(df[birth_year_col]), np.ones(len(GEN_Z_BIRTH_YEARS))),
+    ]
+    weights, report = rake([d[2] for d in dimensions], [d[3] for d in dimensions], trim=trim)
+
+    rows = []
+    for (label, levels, codes, _), target, achieved in zip(dimensions, report["targets"], report["margins"]):
+        valid = codes >= 0
+        sample = np.bincount(codes[valid], minlength=len(levels)) / max(valid.sum(), 1)
+        rows.append(pd.DataFrame({
+            "Dimensi": label,
+            "Level": [str(level) for level in levels],
+            "Sampel (%)": 100 * sample,
+            "Target (%)": 100 * target,
+            "Tercapai (%)": 100 * achieved,
+        }))
+    margins = pd.concat(rows, ignore_index=True) if rows else pd.DataFrame()
+    # Level yang tidak punya responden maupun target tidak perlu ditampilkan
+    margins = margins[(margins["Sampel (%)"] > 0) | (margins["Target (%)"] > 0)].reset_index(drop=True)
+    return weights, {
+        "converged": report["converged"],
+        "iterations": report["iterations"],
+        "max_gap": report["max_gap"],
+        "trim": trim,
+        "margins": margins,
+    }
+
+
+# ==================== AGREGAT BERBOBOT ====================
+def weighted_mean(values, weights=None):
+    values = pd.to_numeric(values, errors="coerce").to_numpy(dtype=float)
+    weights = np.ones(len(values)) if weights is None else np.asarray(weights, dtype=float)
+    valid = ~np.isnan(values)
+    total = weights[valid].sum()
+    return np.dot(values[valid], weights[valid]) / total if total > 0 else np.nan
+
+
+def weighted_counts(series, weights=None):
+    if weights is None:
+        return series.value_counts()
+    codes, levels = pd.factorize(series)
+    valid = codes >= 0
+    counts = np.bincount(codes[valid], weights=np.asarray(weights, dtype=float)[valid], minlength=len(levels))
+    return pd.Series(counts, index=levels, name="count").sort_values(ascending=False)
+
+
+def weighted_column_means(df, columns, weights=None):
+    values = df[columns].apply(pd.to_numeric, errors="coerce")
+    if weights is None:
+        return values.mean()
+    weights = np.asarray(weights, dtype=float)
+    return values.mul(weights, axis=0).sum() / values.notna().mul(weights, axis=0).sum()
+
+
+def weighted_group_mean(df, by, columns, weights=None):
+    if weights is None:
+        return df.groupby(by)[columns].mean()
+    weights = pd.Series(np.asarray(weights, dtype=float), index=df.index)
+    values = df[columns].apply(pd.to_numeric, errors="coerce")
+    weighted = values.mul(weights, axis=0)
+    present = values.notna().mul(weights, axis=0)
+    keys = df[by]
+    return weighted.groupby(keys).sum() / present.groupby(keys).sum()